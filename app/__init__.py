@@ -22,27 +22,44 @@ def create_app():
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.config.from_object(Config)
 
+    from .database import init_database
+
     db.init_app(app)
     migrate.init_app(app, db)
+    init_database(app)
     login_manager.init_app(app)
 
     from . import models  # noqa: F401, ensure models registered
     from .routes import main_bp
     from .auth import auth_bp
-    from .api import api_bp
+    from .api import api_bp, calc_asset_cache
+    from .cli import assets_cli, jobs_cli, seed_command
+    from .metrics import init_metrics
+    from .services.chart_renderer import chart_renderer
+    from .services.identity import identity_cache
+    from .services.precompute import precompute_queue
 
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(seed_command)
+    init_metrics(app)
+    precompute_queue.init_app(app)
+    calc_asset_cache.configure(app.config["CALC_CACHE_SIZE"], app.config["CALC_CACHE_TTL"] or None)
+    identity_cache.init_app(app)
 
     @app.context_processor
     def inject_globals():
         return {"current_year": datetime.utcnow().year}
 
-    with app.app_context():
-        charts_path = Path(app.config["CHART_OUTPUT_DIR"])
-        charts_path.mkdir(parents=True, exist_ok=True)
-        models.seed_assets()
-        models.ensure_admin_user()
+    # Seeding is explicit (`flask seed`) and the asset catalog loads on first use,
+    # so starting a worker or a CLI command never touches the database.
+    charts_path = Path(app.config["CHART_OUTPUT_DIR"])
+    charts_path.mkdir(parents=True, exist_ok=True)
+
+    if app.config["CHART_RENDER_WARM_ON_START"]:
+        chart_renderer.warm(app.config["CHART_RENDER_WORKERS"], app.config["CHART_RENDER_START_METHOD"])
 
     return app
@@ -1,10 +1,50 @@
-from flask import Blueprint, jsonify, request
+from itertools import product
+from math import prod
 
-from .models import Asset, UserAsset
-from .models.calculations import build_portfolio_series, calculate_roi, compound_growth
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required
+
+from .models.calculations import (
+    PERIODS_PER_YEAR,
+    project_growth,
+    project_portfolio,
+    project_portfolio_batch,
+    project_steps,
+    step_returns,
+)
+from .caching import LRUCache
+from .metrics import span
+from .models.montecarlo import simulate_portfolio
+from .models.rebalancing import simulate_rebalancing
+from .models.returns_cache import returns_cache
+from .services.catalog import asset_catalog
+from .services.identity import identity_cache
+from .services.portfolio import (
+    attach_periodic_returns,
+    get_holdings_for_users,
+    get_portfolio_snapshot,
+    get_user_holdings,
+    portfolio_items_from_holdings,
+)
+from .services.precompute import chart_inputs
 
 api_bp = Blueprint("api", __name__)
 
+GRID_FIELDS = ("amount", "monthly_contribution", "yearly_contribution")
+
+# calc-asset is a pure function of the asset's returns and the request numbers.
+calc_asset_cache = LRUCache()
+
+
+def _resolution_error(resolution):
+    supported = ", ".join(PERIODS_PER_YEAR)
+    return jsonify({"error": f"Unsupported resolution '{resolution}'. Use one of: {supported}"}), 400
+
+
+def _resolution_details(portfolio_items, resolution):
+    steps = max((len(step_returns(item, resolution)) for item in portfolio_items), default=0)
+    return {"resolution": resolution, "steps_per_year": PERIODS_PER_YEAR[resolution], "steps": steps}
+
 
 @api_bp.route("/calc-asset", methods=["POST"])
 def calc_asset():
@@ -13,87 +53,255 @@ def calc_asset():
     initial_amount = float(payload.get("initial_amount", 0))
     monthly_contribution = float(payload.get("monthly_contribution", 0))
     yearly_contribution = float(payload.get("yearly_contribution", 0))
+    resolution = payload.get("resolution", "annual")
+    if resolution not in PERIODS_PER_YEAR:
+        return _resolution_error(resolution)
 
-    asset = Asset.query.filter_by(name=asset_name).first()
+    asset = asset_catalog.get_by_name(asset_name)
     if not asset:
         return jsonify({"error": "Asset not found"}), 404
 
-    returns = asset.historical_returns
-    base_amount = initial_amount or asset.default_amount
-    yearly_values = compound_growth(base_amount, returns, monthly_contribution, yearly_contribution)
-    roi_value = calculate_roi(base_amount, returns, monthly_contribution, yearly_contribution)
-
-    return jsonify(
-        {
-            "yearly_values": yearly_values,
-            "roi": roi_value,
+    base_amount = float(initial_amount or asset.default_amount)
+    if resolution == "annual":
+        item = {"returns": asset.historical_returns}
+        version = asset.returns_version
+    else:
+        item = attach_periodic_returns([{"asset_id": asset.id, "returns": asset.historical_returns}])[0]
+        version = (asset.returns_version, item.get("periodic_version"))
+    cache_key = (asset.id, version, resolution, base_amount, monthly_contribution, yearly_contribution)
+    result = calc_asset_cache.get(cache_key)
+    if result is None:
+        with span("calc"):
+            if resolution == "annual":
+                projection = project_growth(base_amount, item["returns"], monthly_contribution, yearly_contribution)
+            else:
+                projection = project_steps(
+                    base_amount,
+                    step_returns(item, resolution),
+                    resolution,
+                    monthly_contribution,
+                    yearly_contribution,
+                )
+        result = {
+            "yearly_values": projection.series,
+            "roi": projection.roi,
         }
-    )
+        if resolution != "annual":
+            result.update(_resolution_details([item], resolution))
+        calc_asset_cache.set(cache_key, result)
 
+    return jsonify(result)
 
-@api_bp.route("/calc-portfolio", methods=["POST"])
-def calc_portfolio():
-    payload = request.get_json() or {}
-    user_id = payload.get("user_id")
-    portfolio_payload = payload.get("portfolio", [])
 
+def _payload_portfolio_items(portfolio_payload, assets_by_name):
     portfolio_items = []
+    for entry in portfolio_payload:
+        asset = assets_by_name.get(entry.get("asset"))
+        if not asset:
+            continue
+        portfolio_items.append(
+            {
+                "asset_id": asset.id,
+                "amount": entry.get("amount", asset.default_amount),
+                "returns": asset.historical_returns,
+                "name": asset.name,
+                "percent": entry.get("percent", 0),
+                "monthly_contribution": entry.get("monthly_contribution", 0),
+                "yearly_contribution": entry.get("yearly_contribution", 0),
+            }
+        )
+    return portfolio_items
 
-    if user_id:
-        user_assets = UserAsset.query.filter_by(user_id=user_id).all()
-        for item in user_assets:
-            portfolio_items.append(
-                {
-                    "amount": item.invested_amount,
-                    "returns": item.asset.historical_returns,
-                    "name": item.asset.name,
-                    "percent": item.allocation_percent,
-                    "monthly_contribution": item.monthly_contribution,
-                    "yearly_contribution": item.yearly_contribution,
-                }
-            )
-    else:
-        for entry in portfolio_payload:
-            asset = Asset.query.filter_by(name=entry.get("asset")).first()
-            if not asset:
-                continue
-            portfolio_items.append(
-                {
-                    "amount": entry.get("amount", asset.default_amount),
-                    "returns": asset.historical_returns,
-                    "name": asset.name,
-                    "percent": entry.get("percent", 0),
-                    "monthly_contribution": entry.get("monthly_contribution", 0),
-                    "yearly_contribution": entry.get("yearly_contribution", 0),
-                }
-            )
-
-    total_series, per_asset_series = build_portfolio_series(portfolio_items)
+
+def _portfolio_summary(portfolio_items, projection):
     allocation = {}
     invested_total = sum(item["amount"] for item in portfolio_items)
     for item in portfolio_items:
         percent = (item["amount"] / invested_total * 100) if invested_total else 0
         allocation[item["name"]] = round(percent, 2)
 
-    total_contributions = 0.0
-    for item in portfolio_items:
-        years = len(item["returns"])
-        total_contributions += (
-            item["amount"]
-            + item.get("yearly_contribution", 0) * years
-            + item.get("monthly_contribution", 0) * 12 * years
+    return {
+        "yearly_values": projection.series,
+        "roi": projection.roi,
+        "allocation": allocation,
+        "per_asset_series": {
+            item["name"]: asset.series for item, asset in zip(portfolio_items, projection.assets)
+        },
+    }
+
+
+@api_bp.route("/calc-portfolio", methods=["POST"])
+def calc_portfolio():
+    payload = request.get_json() or {}
+    user_id = payload.get("user_id")
+    portfolio_payload = payload.get("portfolio", [])
+    resolution = payload.get("resolution", "annual")
+    if resolution not in PERIODS_PER_YEAR:
+        return _resolution_error(resolution)
+
+    snapshot = None
+    if user_id and resolution == "annual":
+        # A stored user's projection is one primary-key read; no holdings or returns are loaded.
+        snapshot = get_portfolio_snapshot(user_id)
+        portfolio_items, projection = snapshot.portfolio_items, snapshot.projection
+    else:
+        if user_id:
+            portfolio_items = portfolio_items_from_holdings(get_user_holdings(user_id))
+        else:
+            assets_by_name = asset_catalog.resolve_names(entry.get("asset") for entry in portfolio_payload)
+            portfolio_items = _payload_portfolio_items(portfolio_payload, assets_by_name)
+
+        if resolution != "annual":
+            attach_periodic_returns(portfolio_items)
+        with span("calc"):
+            projection = project_portfolio(portfolio_items, resolution)
+    summary = _portfolio_summary(portfolio_items, projection)
+    if resolution != "annual":
+        summary.update(_resolution_details(portfolio_items, resolution))
+
+    simulation = payload.get("simulation")
+    rebalance = payload.get("rebalance")
+    if snapshot is not None and (simulation or rebalance):
+        # Resampling and rebalancing need the returns the snapshot does not carry.
+        portfolio_items = portfolio_items_from_holdings(get_user_holdings(user_id))
+
+    if simulation:
+        options = simulation if isinstance(simulation, dict) else {}
+        config = current_app.config
+        try:
+            paths = int(options.get("paths", config["MONTE_CARLO_DEFAULT_PATHS"]))
+            years = options.get("years")
+            years = int(years) if years is not None else None
+            seed = options.get("seed")
+            seed = int(seed) if seed is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"error": "paths, years and seed must be integers"}), 400
+        if not 0 < paths <= config["MONTE_CARLO_MAX_PATHS"]:
+            return jsonify({"error": f"paths must be between 1 and {config['MONTE_CARLO_MAX_PATHS']}"}), 400
+        if years is not None and not 0 < years <= config["MONTE_CARLO_MAX_YEARS"]:
+            return jsonify({"error": f"years must be between 1 and {config['MONTE_CARLO_MAX_YEARS']}"}), 400
+        if seed is not None and seed < 0:
+            return jsonify({"error": "seed must not be negative"}), 400
+        with span("calc"):
+            summary["simulation"] = simulate_portfolio(portfolio_items, paths, years, seed)
+
+    if rebalance:
+        options = rebalance if isinstance(rebalance, dict) else {}
+        try:
+            threshold = float(options.get("threshold", 0.05))
+        except (TypeError, ValueError):
+            return jsonify({"error": "threshold must be a number"}), 400
+        try:
+            with span("calc"):
+                summary["rebalancing"] = simulate_rebalancing(
+                    portfolio_items,
+                    options.get("policy", "calendar"),
+                    options.get("frequency", "annual"),
+                    threshold,
+                    resolution,
+                )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+    return jsonify(summary)
+
+
+def _grid_fields(grid):
+    return [field for field in GRID_FIELDS if grid.get(field)]
+
+
+def _expand_grid(base_payload, grid):
+    fields = _grid_fields(grid)
+    variants = []
+    for combination in product(*(grid[field] for field in fields)):
+        overrides = dict(zip(fields, combination))
+        variants.append(
+            {
+                "portfolio": [{**entry, **overrides} for entry in base_payload],
+                "parameters": overrides,
+            }
         )
-    roi_value = 0.0
-    if total_series and total_contributions:
-        roi_value = (total_series[-1] - total_contributions) / total_contributions
+    return variants
+
+
+@api_bp.route("/calc-portfolio/batch", methods=["POST"])
+def calc_portfolio_batch():
+    payload = request.get_json() or {}
+    requests_payload = list(payload.get("portfolios", []))
+    resolution = payload.get("resolution", "annual")
+    if resolution not in PERIODS_PER_YEAR:
+        return _resolution_error(resolution)
+    grid = payload.get("grid")
+    grid_size = 0
+    if grid:
+        fields = _grid_fields(grid) if isinstance(grid, dict) else None
+        if fields is None or not all(isinstance(grid[field], list) for field in fields):
+            return jsonify({"error": f"grid must map {', '.join(GRID_FIELDS)} to lists of values"}), 400
+        grid_size = prod(len(grid[field]) for field in fields)
+
+    # Checked before expanding the grid, whose size is the product of its list lengths.
+    max_items = current_app.config["BATCH_MAX_PORTFOLIOS"]
+    if len(requests_payload) + grid_size > max_items:
+        return jsonify({"error": f"At most {max_items} portfolios per batch"}), 400
+    if grid:
+        requests_payload.extend(_expand_grid(payload.get("portfolio", []), grid))
+
+    assets_by_name = asset_catalog.resolve_names(
+        entry.get("asset") for item in requests_payload for entry in item.get("portfolio", [])
+    )
+
+    try:
+        user_ids = [int(item["user_id"]) if item.get("user_id") else None for item in requests_payload]
+    except (TypeError, ValueError):
+        return jsonify({"error": "user_id must be an integer"}), 400
+    holdings_by_user, holding_returns = get_holdings_for_users({user_id for user_id in user_ids if user_id})
+
+    portfolios = []
+    for item, user_id in zip(requests_payload, user_ids):
+        if user_id:
+            portfolios.append(portfolio_items_from_holdings(holdings_by_user[user_id], holding_returns))
+        else:
+            portfolios.append(_payload_portfolio_items(item.get("portfolio", []), assets_by_name))
+
+    if resolution != "annual":
+        attach_periodic_returns([item for portfolio_items in portfolios for item in portfolio_items])
+
+    results = []
+    with span("calc"):
+        projections = project_portfolio_batch(portfolios, resolution)
+    for item, portfolio_items, projection in zip(requests_payload, portfolios, projections):
+        summary = _portfolio_summary(portfolio_items, projection)
+        if resolution != "annual":
+            summary.update(_resolution_details(portfolio_items, resolution))
+        if "parameters" in item:
+            summary["parameters"] = item["parameters"]
+        results.append(summary)
+
+    return jsonify({"results": results})
+
+
+@api_bp.route("/chart-data", methods=["GET"])
+@login_required
+def chart_data():
+    portfolio_items, projection, bands = chart_inputs(current_user.id, get_user_holdings(current_user.id))
+    return jsonify(
+        {
+            "portfolio": projection.series,
+            "bands": bands,
+            "assets": [
+                {"name": item["name"], "values": asset.series}
+                for item, asset in zip(portfolio_items, projection.assets)
+            ],
+        }
+    )
+
 
+@api_bp.route("/cache-stats", methods=["GET"])
+def cache_stats():
     return jsonify(
         {
-            "yearly_values": total_series,
-            "roi": round(roi_value, 4),
-            "allocation": allocation,
-            "per_asset_series": {
-                item["name"]: series for item, series in zip(portfolio_items, per_asset_series)
-            },
+            "returns": returns_cache.stats(),
+            "calc_asset": calc_asset_cache.stats(),
+            "identity": identity_cache.local.stats(),
         }
     )
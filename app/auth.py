@@ -3,6 +3,7 @@ from flask_login import current_user, login_required, login_user, logout_user
 
 from . import db
 from .models import User
+from .services.identity import identity_cache
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -51,6 +52,7 @@ def login():
 @auth_bp.route("/logout")
 @login_required
 def logout():
+    identity_cache.invalidate(current_user.id)
     logout_user()
     flash("Logged out successfully", "info")
     return redirect(url_for("main.index"))
@@ -0,0 +1,236 @@
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import insert, select, update
+
+from . import db
+from .models import Asset, bump_holdings_version_for_assets, ensure_admin_user, seed_assets
+from .models.calculations import PERIODS_PER_YEAR, resample_returns
+from .models.returns_cache import pack_returns, returns_cache
+from .services.catalog import asset_catalog
+from .services.precompute import precompute_queue
+
+assets_cli = AppGroup("assets", help="Manage the asset catalog.")
+jobs_cli = AppGroup("jobs", help="Run background chart precompute jobs.")
+
+
+@click.command("seed")
+@click.option(
+    "--admin/--no-admin",
+    default=True,
+    show_default=True,
+    help="Also create the admin user from ADMIN_EMAIL/ADMIN_PASSWORD.",
+)
+@with_appcontext
+def seed_command(admin):
+    """Load the curated assets and the admin user into an empty database."""
+    seed_assets()
+    if admin:
+        ensure_admin_user()
+    asset_catalog.invalidate()
+    click.echo("Database seeded.")
+
+
+def _read_chunks(path: str, file_format: str, columns: List[str], chunk_size: int) -> Iterator:
+    if file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise click.ClickException("Parquet import requires pyarrow (pip install pyarrow)") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    import pandas as pd
+
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+
+
+def _asset_series(chunks: Iterator, asset_column: str, return_column: str):
+    """Yield (name, rows) per asset from a stream of chunks.
+
+    Rows of one asset must be contiguous in the file; an asset may span chunks, so the
+    last asset of every chunk is held back until the next chunk shows it has ended.
+    """
+    import pandas as pd
+
+    def not_contiguous(name):
+        return click.ClickException(f"Rows for asset '{name}' are not contiguous; sort the file by asset")
+
+    seen = set()
+    carry_name, carry_frame = None, None
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=[asset_column, return_column])
+        # groupby would silently merge split runs within a chunk, so every name must start one run.
+        names = chunk[asset_column]
+        run_names = names[names.ne(names.shift())]
+        repeated = run_names[run_names.duplicated()]
+        if not repeated.empty:
+            raise not_contiguous(repeated.iloc[0])
+        for name, frame in chunk.groupby(asset_column, sort=False):
+            if name == carry_name:
+                carry_frame = pd.concat([carry_frame, frame])
+                continue
+            if carry_name is not None:
+                yield carry_name, carry_frame
+            if name in seen:
+                raise not_contiguous(name)
+            seen.add(name)
+            carry_name, carry_frame = name, frame
+    if carry_name is not None:
+        yield carry_name, carry_frame
+
+
+class _AssetWriter:
+    """Buffers parsed series and upserts them by name, one transaction per batch."""
+
+    def __init__(self, resolution: str, default_amount: float, batch_size: int):
+        self.resolution = resolution
+        self.default_amount = default_amount
+        self.batch_size = batch_size
+        self.pending: List[Tuple[str, np.ndarray]] = []
+        self.inserted = 0
+        self.updated = 0
+
+    def add(self, name: str, values: np.ndarray):
+        self.pending.append((name, values))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _columns(self, values: np.ndarray) -> Dict:
+        if self.resolution == "annual":
+            annual = values
+            # Drop any native series from an earlier import; projections prefer it over the annual returns.
+            columns = {"periodic_returns_blob": None, "periodic_resolution": None}
+        else:
+            annual = resample_returns(values, self.resolution, "annual")
+            columns = {"periodic_returns_blob": pack_returns(values), "periodic_resolution": self.resolution}
+        columns["historical_returns_json"] = json.dumps(annual.tolist())
+        columns["historical_returns_blob"] = pack_returns(annual)
+        return columns
+
+    def flush(self):
+        if not self.pending:
+            return
+        names = [name for name, _ in self.pending]
+        existing = dict(db.session.execute(select(Asset.name, Asset.id).where(Asset.name.in_(names))).all())
+
+        updates, inserts = [], []
+        for name, values in self.pending:
+            columns = self._columns(values)
+            if name in existing:
+                updates.append({"id": existing[name], **columns})
+            else:
+                inserts.append({"name": name, "default_amount": self.default_amount, **columns})
+
+        # ORM bulk statements run as a single executemany per batch.
+        if updates:
+            db.session.execute(update(Asset), updates)
+        if inserts:
+            db.session.execute(insert(Asset), inserts)
+        if updates:
+            db.session.execute(bump_holdings_version_for_assets(row["id"] for row in updates))
+        db.session.commit()
+
+        self.updated += len(updates)
+        self.inserted += len(inserts)
+        self.pending = []
+
+
+@assets_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "parquet"]),
+    help="File format; defaults to the file extension.",
+)
+@click.option(
+    "--resolution",
+    type=click.Choice(list(PERIODS_PER_YEAR)),
+    default="annual",
+    show_default=True,
+    help="Resolution of the returns. Monthly/daily series are kept and compounded into annual returns.",
+)
+@click.option("--asset-column", default="asset", show_default=True)
+@click.option("--period-column", default="period", show_default=True)
+@click.option("--return-column", default="return", show_default=True)
+@click.option("--chunk-size", default=100_000, show_default=True, help="Rows read per chunk.")
+@click.option("--batch-size", default=1000, show_default=True, help="Assets upserted per transaction.")
+@click.option("--default-amount", default=1000.0, show_default=True, help="Default amount for new assets.")
+def import_assets(
+    path,
+    file_format,
+    resolution,
+    asset_column,
+    period_column,
+    return_column,
+    chunk_size,
+    batch_size,
+    default_amount,
+):
+    """Stream asset return histories from a long-format CSV/Parquet file.
+
+    Each row holds one asset, period and return; rows of an asset must be
+    contiguous. Assets are matched by name and updated, or created.
+    """
+    file_format = file_format or ("parquet" if path.lower().endswith((".parquet", ".pq")) else "csv")
+    columns = [asset_column, period_column, return_column]
+    writer = _AssetWriter(resolution, default_amount, batch_size)
+
+    started = time.perf_counter()
+    rows = 0
+    chunks = _read_chunks(path, file_format, columns, chunk_size)
+    for name, frame in _asset_series(chunks, asset_column, return_column):
+        frame = frame.sort_values(period_column, kind="stable")
+        rows += len(frame)
+        writer.add(str(name), frame[return_column].to_numpy(dtype=float))
+        if not writer.pending:
+            elapsed = time.perf_counter() - started
+            click.echo(f"  {writer.inserted + writer.updated} assets, {rows} rows ({rows / elapsed:,.0f} rows/s)")
+    writer.flush()
+
+    # Bulk statements bypass the ORM events that normally drop these caches
+    # (stale portfolio snapshots were marked batch by batch above).
+    returns_cache.invalidate()
+    asset_catalog.invalidate()
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Imported {rows} rows from {os.path.basename(path)}: {writer.inserted} assets created, "
+        f"{writer.updated} updated in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)"
+    )
+
+
+@jobs_cli.command("work")
+@click.option("--burst", is_flag=True, help="Exit once the queue is empty.")
+@click.option("--interval", default=2.0, show_default=True, help="Seconds between polls of an empty queue.")
+def work_jobs(burst, interval):
+    """Process queued chart precompute jobs in this process.
+
+    Use it next to the in-process worker thread, or instead of it with
+    PRECOMPUTE_WORKER_THREAD=0.
+    """
+    app = current_app._get_current_object()
+    processed = 0
+    click.echo(f"{precompute_queue.pending()} jobs pending")
+    try:
+        while True:
+            # A fresh app context per job, so every job reads current holdings.
+            with app.app_context():
+                ran = precompute_queue.work_once()
+            if ran:
+                processed += 1
+            elif burst:
+                break
+            else:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"Processed {processed} jobs.")
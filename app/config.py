@@ -3,8 +3,52 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
 
 
+def _engine_options(database_uri: str) -> dict:
+    # SQLite gets per-connection pragmas instead (see app.database); pool sizing is for server databases.
+    if database_uri.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    }
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-key")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'project.db')}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
     CHART_OUTPUT_DIR = os.path.join(BASE_DIR, "app", "static", "charts")
+    BATCH_MAX_PORTFOLIOS = int(os.getenv("BATCH_MAX_PORTFOLIOS", "500"))
+    ASSET_CATALOG_TTL = float(os.getenv("ASSET_CATALOG_TTL", "300"))
+    CHART_CACHE_MAX_FILES = int(os.getenv("CHART_CACHE_MAX_FILES", "1000"))
+    CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    CHART_CACHE_MAX_AGE = int(os.getenv("CHART_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+    CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "10"))
+    CHART_RENDER_START_METHOD = os.getenv("CHART_RENDER_START_METHOD") or None
+    CHART_RENDER_WARM_ON_START = os.getenv("CHART_RENDER_WARM_ON_START", "0") == "1"
+    CHART_DELIVERY = os.getenv("CHART_DELIVERY", "png")
+    CHART_STREAM_IMAGES = os.getenv("CHART_STREAM_IMAGES", "0") == "1"
+    MONTE_CARLO_DEFAULT_PATHS = int(os.getenv("MONTE_CARLO_DEFAULT_PATHS", "10000"))
+    MONTE_CARLO_MAX_PATHS = int(os.getenv("MONTE_CARLO_MAX_PATHS", "50000"))
+    MONTE_CARLO_MAX_YEARS = int(os.getenv("MONTE_CARLO_MAX_YEARS", "100"))
+    MONTE_CARLO_CHART_PATHS = int(os.getenv("MONTE_CARLO_CHART_PATHS", "2000"))
+    MONTE_CARLO_CHART_SEED = int(os.getenv("MONTE_CARLO_CHART_SEED", "2024"))
+    CALC_CACHE_SIZE = int(os.getenv("CALC_CACHE_SIZE", "4096"))
+    CALC_CACHE_TTL = float(os.getenv("CALC_CACHE_TTL", "3600"))
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "1") == "1"
+    PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "1") == "1"
+    PRECOMPUTE_QUEUE_PATH = os.getenv("PRECOMPUTE_QUEUE_PATH", os.path.join(BASE_DIR, "jobs.db"))
+    PRECOMPUTE_WORKER_THREAD = os.getenv("PRECOMPUTE_WORKER_THREAD", "1") == "1"
+    PRECOMPUTE_POLL_INTERVAL = float(os.getenv("PRECOMPUTE_POLL_INTERVAL", "5"))
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "1024"))
+    IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "30"))
+    IDENTITY_CACHE_BACKEND = os.getenv("IDENTITY_CACHE_BACKEND") or None
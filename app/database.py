@@ -0,0 +1,38 @@
+import sqlite3
+
+from flask import Flask
+from sqlalchemy import event
+
+from . import db
+
+
+def _sqlite_pragmas(wal: bool, synchronous: str, busy_timeout: int):
+    def on_connect(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers run alongside the single writer instead of blocking on the file lock.
+        if wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+        cursor.close()
+
+    return on_connect
+
+
+def init_database(app: Flask):
+    """Tune every new SQLite connection; other databases take their pool options from Config."""
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+    config = app.config
+    synchronous = config["SQLITE_SYNCHRONOUS"].upper()
+    if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS: {synchronous}")
+    with app.app_context():
+        # Only registers the listener; no connection is opened here.
+        event.listen(
+            db.engine,
+            "connect",
+            _sqlite_pragmas(config["SQLITE_WAL"], synchronous, config["SQLITE_BUSY_TIMEOUT"]),
+        )
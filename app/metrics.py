@@ -0,0 +1,186 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, Optional, Tuple
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request duration histogram buckets, in seconds.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = "roi_planner"
+
+
+class RequestTimings:
+    """Spans collected while one request is handled: name -> (calls, seconds)."""
+
+    __slots__ = ("started", "calls", "seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    def add(self, name: str, seconds: float):
+        self.calls[name] += 1
+        self.seconds[name] += seconds
+
+
+def _current_timings() -> Optional[RequestTimings]:
+    return g.get("request_timings") if has_request_context() else None
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block of the current request under ``name``; a no-op unless metrics are enabled."""
+    timings = _current_timings()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Process-wide aggregates of request timings, rendered in Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+            self._durations: Dict[str, list] = {}
+            self._span_calls: Dict[Tuple[str, str], int] = defaultdict(int)
+            self._span_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+
+    def observe(self, endpoint: str, method: str, status: int, duration: float, timings: RequestTimings):
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            histogram = self._durations.setdefault(endpoint, [0] * len(self.buckets) + [0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[index] += 1
+            histogram[-2] += duration
+            histogram[-1] += 1
+            for name, calls in timings.calls.items():
+                self._span_calls[(endpoint, name)] += calls
+                self._span_seconds[(endpoint, name)] += timings.seconds[name]
+
+    def render(self) -> str:
+        with self._lock:
+            requests = dict(self._requests)
+            durations = {endpoint: list(values) for endpoint, values in self._durations.items()}
+            span_calls = dict(self._span_calls)
+            span_seconds = dict(self._span_seconds)
+
+        lines = [
+            f"# HELP {PREFIX}_http_requests_total Requests handled, by endpoint, method and status.",
+            f"# TYPE {PREFIX}_http_requests_total counter",
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(
+                f"{PREFIX}_http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}"
+            )
+
+        lines += [
+            f"# HELP {PREFIX}_http_request_duration_seconds Request wall time, by endpoint.",
+            f"# TYPE {PREFIX}_http_request_duration_seconds histogram",
+        ]
+        for endpoint, values in sorted(durations.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(
+                    f"{PREFIX}_http_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=f'{bound:g}')} {count}"
+                )
+            lines.append(
+                f"{PREFIX}_http_request_duration_seconds_bucket{_labels(endpoint=endpoint, le='+Inf')} {values[-1]}"
+            )
+            lines.append(f"{PREFIX}_http_request_duration_seconds_sum{_labels(endpoint=endpoint)} {values[-2]:.6f}")
+            lines.append(f"{PREFIX}_http_request_duration_seconds_count{_labels(endpoint=endpoint)} {values[-1]}")
+
+        lines += [
+            f"# HELP {PREFIX}_span_seconds_total Time spent in SQL, calculation and chart spans, by endpoint.",
+            f"# TYPE {PREFIX}_span_seconds_total counter",
+        ]
+        for (endpoint, name), seconds in sorted(span_seconds.items()):
+            lines.append(f"{PREFIX}_span_seconds_total{_labels(endpoint=endpoint, span=name)} {seconds:.6f}")
+
+        lines += [
+            f"# HELP {PREFIX}_span_calls_total Span executions by endpoint; for span=\"sql\" the statement count.",
+            f"# TYPE {PREFIX}_span_calls_total counter",
+        ]
+        for (endpoint, name), calls in sorted(span_calls.items()):
+            lines.append(f"{PREFIX}_span_calls_total{_labels(endpoint=endpoint, span=name)} {calls}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    timings = _current_timings()
+    if started is not None and timings is not None:
+        timings.add("sql", time.perf_counter() - started)
+
+
+def _start_request():
+    g.request_timings = RequestTimings()
+
+
+def _server_timing(timings: RequestTimings, total: float) -> str:
+    entries = []
+    for name, seconds in timings.seconds.items():
+        entry = f"{name};dur={seconds * 1000:.2f}"
+        if name == "sql":
+            entry += f';desc="{timings.calls[name]} queries"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def _finish_request(response: Response) -> Response:
+    timings = g.pop("request_timings", None)
+    if timings is None:
+        return response
+    duration = time.perf_counter() - timings.started
+    metrics_registry.observe(request.endpoint or "unmatched", request.method, response.status_code, duration, timings)
+    if current_app.config["METRICS_SERVER_TIMING"]:
+        response.headers["Server-Timing"] = _server_timing(timings, duration)
+    return response
+
+
+def metrics_endpoint():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app: Flask):
+    if not app.config["METRICS_ENABLED"]:
+        return
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint)
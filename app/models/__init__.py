@@ -1,10 +1,18 @@
 import json
 import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 from flask_login import UserMixin
+from sqlalchemy import Numeric, case, cast, event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from .. import db, login_manager
+from .. import db
+from .calculations import PERIODS_PER_YEAR, PortfolioProjection, Projection
+from .returns_cache import pack_returns, periodic_key, returns_cache, returns_version, unpack_returns
 
 
 class User(UserMixin, db.Model):
@@ -13,6 +21,9 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default="user")
+    invested_total = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    # Bumped in the same transaction as any change to the user's holdings or their assets.
+    holdings_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     assets = db.relationship("UserAsset", back_populates="user", cascade="all, delete-orphan")
 
@@ -27,18 +38,58 @@ class User(UserMixin, db.Model):
 class Asset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), unique=True, nullable=False)
-    historical_returns_json = db.Column(db.Text, nullable=False)
+    historical_returns_json = db.deferred(db.Column(db.Text, nullable=False))
+    historical_returns_blob = db.Column(db.LargeBinary, nullable=True)
     default_amount = db.Column(db.Float, default=1000.0)
+    # Optional native monthly/daily series, packed like historical_returns_blob.
+    periodic_returns_blob = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    periodic_resolution = db.Column(db.String(10), nullable=True)
 
     user_assets = db.relationship("UserAsset", back_populates="asset")
 
+    @property
+    def _returns_source(self):
+        # The packed column is authoritative; JSON is only read for rows not yet backfilled.
+        if self.historical_returns_blob is not None:
+            return self.historical_returns_blob
+        return self.historical_returns_json
+
     @property
     def historical_returns(self):
-        data = json.loads(self.historical_returns_json or "[]")
-        return data
+        return returns_cache.get(self.id, self._returns_source)
+
+    @property
+    def returns_version(self):
+        return returns_version(self._returns_source)
+
+    @property
+    def periodic_returns(self):
+        if self.periodic_returns_blob is None:
+            return None
+        return returns_cache.get(periodic_key(self.id), self.periodic_returns_blob)
+
+    def set_historical_returns(self, values: Sequence[float]):
+        self.historical_returns_json = json.dumps(list(values))
+
+    def set_periodic_returns(self, values: Optional[Sequence[float]], resolution: Optional[str] = None):
+        if values is None:
+            self.periodic_returns_blob = None
+            self.periodic_resolution = None
+            return
+        if resolution not in PERIODS_PER_YEAR or resolution == "annual":
+            raise ValueError(f"Unsupported periodic resolution: {resolution}")
+        self.periodic_returns_blob = pack_returns(values)
+        self.periodic_resolution = resolution
+
+
+@event.listens_for(Asset.historical_returns_json, "set")
+def _pack_returns_on_set(target, value, oldvalue, initiator):
+    target.historical_returns_blob = pack_returns(json.loads(value or "[]"))
 
 
 class UserAsset(db.Model):
+    __table_args__ = (db.Index("ix_user_asset_user_id_asset_id", "user_id", "asset_id", unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     asset_id = db.Column(db.Integer, db.ForeignKey("asset.id"), nullable=False)
@@ -51,9 +102,142 @@ class UserAsset(db.Model):
     asset = db.relationship("Asset", back_populates="user_assets")
 
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+class PortfolioSnapshot(db.Model):
+    """A user's annual portfolio projection, stored so read endpoints need no recompute.
+
+    A row is current while its ``holdings_version`` equals the user's, which every
+    change to the user's holdings or one of their assets bumps; ``fingerprint``
+    records the holdings the row was built from.
+    """
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    holdings_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    fingerprint = db.Column(db.String(32), nullable=False)
+    # [{"asset_id", "name", "amount", "series", "final_value", "total_invested", "roi"}, ...]
+    assets_json = db.Column(db.Text, nullable=False)
+    series_json = db.Column(db.Text, nullable=False)
+    final_value = db.Column(db.Float, nullable=False)
+    total_invested = db.Column(db.Float, nullable=False)
+    roi = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def store_projection(
+        self,
+        holdings_version: int,
+        fingerprint: str,
+        portfolio_items: List[Dict],
+        projection: PortfolioProjection,
+    ):
+        self.holdings_version = holdings_version
+        self.fingerprint = fingerprint
+        self.assets_json = json.dumps(
+            [
+                {
+                    "asset_id": item["asset_id"],
+                    "name": item["name"],
+                    "amount": item["amount"],
+                    "series": asset.series,
+                    "final_value": asset.final_value,
+                    "total_invested": asset.total_invested,
+                    "roi": asset.roi,
+                }
+                for item, asset in zip(portfolio_items, projection.assets)
+            ]
+        )
+        self.series_json = json.dumps(projection.series)
+        self.final_value = projection.final_value
+        self.total_invested = projection.total_invested
+        self.roi = projection.roi
+        self.updated_at = datetime.utcnow()
+
+    @property
+    def portfolio_items(self) -> List[Dict]:
+        """Name, asset id and amount per holding, enough for the API summary."""
+        return [
+            {"asset_id": entry["asset_id"], "name": entry["name"], "amount": entry["amount"]}
+            for entry in json.loads(self.assets_json)
+        ]
+
+    @property
+    def projection(self) -> PortfolioProjection:
+        return PortfolioProjection(
+            series=json.loads(self.series_json),
+            assets=[
+                Projection(entry["series"], entry["final_value"], entry["total_invested"], entry["roi"])
+                for entry in json.loads(self.assets_json)
+            ],
+            final_value=self.final_value,
+            total_invested=self.total_invested,
+            roi=self.roi,
+        )
+
+
+def bump_holdings_version(user_ids):
+    """UPDATE statement marking the snapshots of ``user_ids`` (a list or a subquery) stale."""
+    users = User.__table__
+    return users.update().where(users.c.id.in_(user_ids)).values(holdings_version=users.c.holdings_version + 1)
+
+
+def bump_holdings_version_for_assets(asset_ids: Iterable[int]):
+    """``bump_holdings_version`` for every user holding one of ``asset_ids``."""
+    return bump_holdings_version(select(UserAsset.user_id).where(UserAsset.asset_id.in_(list(asset_ids))))
+
+
+@event.listens_for(Asset, "after_update")
+@event.listens_for(Asset, "after_delete")
+def _invalidate_cached_returns(mapper, connection, target):
+    returns_cache.invalidate(target.id)
+    connection.execute(bump_holdings_version_for_assets([target.id]))
+
+
+@event.listens_for(UserAsset, "after_insert")
+@event.listens_for(UserAsset, "after_update")
+@event.listens_for(UserAsset, "after_delete")
+def _invalidate_portfolio_snapshot(mapper, connection, target):
+    connection.execute(bump_holdings_version([target.user_id]))
+
+
+def load_return_matrix(asset_ids: Iterable[int]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """Load packed returns for many assets in one query.
+
+    Returns the asset ids found, a NaN-padded (assets, periods) float64 matrix and
+    the number of periods per asset.
+    """
+    rows = db.session.execute(
+        db.select(Asset.id, Asset.historical_returns_blob, Asset.historical_returns_json).where(
+            Asset.id.in_(list(asset_ids))
+        )
+    ).all()
+    ids = [row.id for row in rows]
+    vectors = [
+        unpack_returns(row.historical_returns_blob)
+        if row.historical_returns_blob is not None
+        else np.asarray(json.loads(row.historical_returns_json or "[]"), dtype=float)
+        for row in rows
+    ]
+    lengths = np.array([len(vector) for vector in vectors], dtype=np.intp)
+    matrix = np.full((len(vectors), int(lengths.max()) if len(vectors) else 0), np.nan)
+    for row, vector in enumerate(vectors):
+        matrix[row, : len(vector)] = vector
+    return ids, matrix, lengths
+
+
+def load_periodic_returns(asset_ids: Iterable[int]) -> Dict[int, Tuple[str, str, Sequence[float]]]:
+    """Load native periodic series for the given assets in one query.
+
+    Maps asset id to (resolution, content version, returns) for assets that have one.
+    """
+    rows = db.session.execute(
+        db.select(Asset.id, Asset.periodic_resolution, Asset.periodic_returns_blob).where(
+            Asset.id.in_(list(asset_ids)), Asset.periodic_returns_blob.is_not(None)
+        )
+    ).all()
+    periodic = {}
+    for row in rows:
+        key = periodic_key(row.id)
+        values = returns_cache.get(key, row.periodic_returns_blob)
+        periodic[row.id] = (row.periodic_resolution, returns_cache.version(key), values)
+    return periodic
 
 
 def seed_assets():
@@ -84,13 +268,10 @@ def seed_assets():
         },
     ]
 
-    if Asset.query.count() == 0:
+    if db.session.query(func.count(Asset.id)).scalar() == 0:
         for entry in default_assets:
-            asset = Asset(
-                name=entry["name"],
-                historical_returns_json=json.dumps(entry["returns"]),
-                default_amount=entry["amount"],
-            )
+            asset = Asset(name=entry["name"], default_amount=entry["amount"])
+            asset.set_historical_returns(entry["returns"])
             db.session.add(asset)
         db.session.commit()
 
@@ -103,7 +284,9 @@ def ensure_admin_user():
     admin_email = os.getenv("ADMIN_EMAIL", "admin@example.com")
     admin_password = os.getenv("ADMIN_PASSWORD", "changeme")
 
-    admin = User.query.filter_by(email=admin_email).first()
+    # Only select the id so startup still works while a migration adding User
+    # columns is pending (create_app runs this before `flask db upgrade`).
+    admin = db.session.query(User.id).filter_by(email=admin_email).first()
     if admin is None:
         admin = User(username="admin", email=admin_email, role="admin")
         admin.set_password(admin_password)
@@ -111,9 +294,64 @@ def ensure_admin_user():
         db.session.commit()
 
 
-def recalculate_allocations(user_id: int):
-    assets = UserAsset.query.filter_by(user_id=user_id).all()
-    total = sum(asset.invested_amount for asset in assets)
-    for asset in assets:
-        asset.allocation_percent = round((asset.invested_amount / total) * 100, 2) if total else 0.0
-    db.session.commit()
+def add_user_asset(
+    user_id: int,
+    asset_id: int,
+    invested_amount: float,
+    monthly_contribution: float = 0.0,
+    yearly_contribution: float = 0.0,
+) -> bool:
+    """Insert a holding unless the user already holds the asset; returns whether it was added.
+
+    The unique (user_id, asset_id) index decides, so no lookup runs first and two
+    concurrent requests cannot both insert. The caller commits.
+    """
+    values = {
+        "user_id": user_id,
+        "asset_id": asset_id,
+        "invested_amount": invested_amount,
+        "monthly_contribution": monthly_contribution,
+        "yearly_contribution": yearly_contribution,
+    }
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        upsert = (sqlite if dialect == "sqlite" else postgresql).insert(UserAsset.__table__)
+        statement = upsert.values(**values).on_conflict_do_nothing(index_elements=["user_id", "asset_id"])
+        if not db.session.execute(statement).rowcount:
+            return False
+        # A Core insert skips the UserAsset ORM events that mark the snapshot stale.
+        db.session.execute(bump_holdings_version([user_id]))
+        return True
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserAsset(**values))
+    except IntegrityError:
+        return False
+    return True
+
+
+def apply_allocation_change(user_id: int, invested_delta: float):
+    # Bumps the stored total and rewrites allocation_percent with one set-based
+    # UPDATE, so no holding is loaded. The caller commits.
+    if not invested_delta:
+        return
+
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(invested_total=User.invested_total + invested_delta)
+        .execution_options(synchronize_session=False)
+    )
+    total = select(User.invested_total).where(User.id == user_id).scalar_subquery()
+    db.session.execute(
+        update(UserAsset)
+        .where(UserAsset.user_id == user_id)
+        .values(
+            allocation_percent=case(
+                (total > 0, func.round(cast(UserAsset.invested_amount * 100 / total, Numeric), 2)),
+                else_=0.0,
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
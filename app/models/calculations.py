@@ -1,4 +1,59 @@
-from typing import Dict, List, Tuple
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Steps per year for each supported return-series resolution. Daily series use
+# trading days, so a month is 21 steps.
+PERIODS_PER_YEAR = {"annual": 1, "monthly": 12, "daily": 252}
+
+
+@dataclass(frozen=True)
+class Projection:
+    series: List[float]
+    final_value: float
+    total_invested: float
+    roi: float
+
+
+@dataclass(frozen=True)
+class PortfolioProjection:
+    series: List[float]
+    assets: List[Projection]
+    final_value: float
+    total_invested: float
+    roi: float
+
+
+def total_invested(
+    initial_amount: float,
+    years: int,
+    monthly_contribution: float = 0.0,
+    yearly_contribution: float = 0.0,
+) -> float:
+    return initial_amount + yearly_contribution * years + monthly_contribution * 12 * years
+
+
+def total_invested_steps(
+    initial_amount: float,
+    steps: int,
+    periods_per_year: int,
+    monthly_contribution: float = 0.0,
+    yearly_contribution: float = 0.0,
+) -> float:
+    # Contributions land at the start of every month/year the series touches.
+    months = -(-steps * 12 // periods_per_year)
+    years = -(-steps // periods_per_year)
+    return initial_amount + yearly_contribution * years + monthly_contribution * months
+
+
+def _roi(final_value: float, invested: float) -> float:
+    if invested == 0:
+        return 0.0
+    return round((final_value - invested) / invested, 4)
 
 
 def compound_growth(
@@ -20,50 +75,351 @@ def compound_growth(
     return values
 
 
+# What one unit of monthly contribution grows to after a year of monthly
+# compounding: g + g**2 + ... + g**12 with g = (1 + rate) ** (1 / 12).
+def monthly_annuity_factor(rates: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_growth_minus_one = np.expm1(np.log1p(rates) / 12)
+        factor = (monthly_growth_minus_one + 1) * rates / monthly_growth_minus_one
+    return np.where(rates == 0, 12.0, factor)
+
+
+def _monthly_annuity_factor_scalar(rate: float) -> float:
+    if rate == 0:
+        return 12.0
+    if rate == -1:
+        return 0.0
+    monthly_growth_minus_one = math.expm1(math.log1p(rate) / 12)
+    return (monthly_growth_minus_one + 1) * rate / monthly_growth_minus_one
+
+
+def _broadcast_scenarios(initial_amounts, returns, monthly_contributions, yearly_contributions):
+    rates = np.atleast_2d(np.asarray(returns, dtype=float))
+    amounts = np.atleast_1d(np.asarray(initial_amounts, dtype=float))
+    monthly = np.atleast_1d(np.asarray(monthly_contributions, dtype=float))
+    yearly = np.atleast_1d(np.asarray(yearly_contributions, dtype=float))
+
+    scenarios = max(rates.shape[0], amounts.shape[0], monthly.shape[0], yearly.shape[0])
+    rates = np.broadcast_to(rates, (scenarios, rates.shape[1]))
+    amounts = np.broadcast_to(amounts, (scenarios,))
+    monthly = np.broadcast_to(monthly, (scenarios,))
+    yearly = np.broadcast_to(yearly, (scenarios,))
+    return rates, amounts, monthly, yearly
+
+
+def compound_growth_batch(
+    initial_amounts: ArrayLike,
+    returns: ArrayLike,
+    monthly_contributions: ArrayLike = 0.0,
+    yearly_contributions: ArrayLike = 0.0,
+) -> np.ndarray:
+    """Closed-form ``compound_growth`` over many scenarios at once.
+
+    ``returns`` is one list of rates shared by every scenario or a 2D array with
+    one row per scenario; ``NaN`` pads shorter rows and carries the value forward.
+
+    The closed form rounds differently from the month-by-month loop, so a value
+    within float error of a half cent can come out one cent away from
+    ``compound_growth``. Results agree with it to within 0.01.
+    """
+    rates, amounts, monthly, yearly = _broadcast_scenarios(
+        initial_amounts, returns, monthly_contributions, yearly_contributions
+    )
+    scenarios, years = rates.shape
+
+    padding = np.isnan(rates)
+    padded = padding.any()
+    filled = np.where(padding, 0.0, rates) if padded else rates
+    growth = 1 + filled
+    annuity = monthly_annuity_factor(filled)
+
+    values = np.empty((scenarios, years + 1))
+    values[:, 0] = amounts
+    current = amounts
+    for year in range(years):
+        stepped = (current + yearly) * growth[:, year] + monthly * annuity[:, year]
+        current = np.where(padding[:, year], current, stepped) if padded else stepped
+        values[:, year + 1] = current
+
+    return np.round(values, 2)
+
+
+def resample_returns(returns: ArrayLike, resolution: str, target: str) -> np.ndarray:
+    """Convert a return series between resolutions.
+
+    Finer targets split every period geometrically (as ``compound_growth`` splits
+    a year into months); coarser targets compound whole periods together, with a
+    trailing partial period compounded over the steps it has.
+    """
+    rates = np.asarray(returns, dtype=float)
+    source_periods = PERIODS_PER_YEAR[resolution]
+    target_periods = PERIODS_PER_YEAR[target]
+    if source_periods == target_periods:
+        return rates
+    if target_periods > source_periods:
+        factor = target_periods // source_periods
+        with np.errstate(divide="ignore"):
+            return np.repeat(np.expm1(np.log1p(rates) / factor), factor)
+
+    factor = source_periods // target_periods
+    padded = np.zeros(-(-len(rates) // factor) * factor)
+    padded[: len(rates)] = rates
+    return np.prod(1 + padded.reshape(-1, factor), axis=1) - 1
+
+
+def compound_growth_steps_batch(
+    initial_amounts: ArrayLike,
+    returns: ArrayLike,
+    periods_per_year: int,
+    monthly_contributions: ArrayLike = 0.0,
+    yearly_contributions: ArrayLike = 0.0,
+) -> np.ndarray:
+    """Time-step counterpart of ``compound_growth_batch`` for monthly or daily series.
+
+    The monthly contribution lands at the first step of every month and the yearly
+    one at the first step of every year, then the step's return is applied. Returns
+    the value after every step, shape (scenarios, steps + 1).
+    """
+    if periods_per_year % 12:
+        raise ValueError("periods_per_year must be a whole number of months")
+
+    rates, amounts, monthly, yearly = _broadcast_scenarios(
+        initial_amounts, returns, monthly_contributions, yearly_contributions
+    )
+    growth, contributions = step_schedule(rates, periods_per_year, monthly, yearly)
+    return np.round(grow_steps(amounts, growth, contributions), 2)
+
+
+def step_schedule(
+    rates: np.ndarray, periods_per_year: int, monthly: np.ndarray, yearly: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Growth factors and contributions per step for NaN-padded (rows, steps) rates.
+
+    Padding steps neither grow nor receive contributions.
+    """
+    padding = np.isnan(rates)
+    growth = np.where(padding, 1.0, 1 + rates)
+    step_index = np.arange(rates.shape[1])
+    contributions = monthly[:, None] * (step_index % (periods_per_year // 12) == 0) + yearly[:, None] * (
+        step_index % periods_per_year == 0
+    )
+    return growth, np.where(padding, 0.0, contributions)
+
+
+def grow_steps(amounts: np.ndarray, growth: np.ndarray, contributions: np.ndarray) -> np.ndarray:
+    """Unrounded values after every step, shape (rows, steps + 1): each step adds its
+    contribution, then applies its growth factor."""
+    rows, steps = growth.shape
+    values = np.empty((rows, steps + 1))
+    values[:, 0] = amounts
+    cumulative = np.cumprod(growth, axis=1)
+    if np.all(cumulative > 0):
+        # V_t = G_t * (V_0 + sum_{k<=t} c_k / G_{k-1}) with G the running growth
+        # product: one cumprod and one cumsum instead of a loop over steps.
+        previous = np.ones_like(cumulative)
+        previous[:, 1:] = cumulative[:, :-1]
+        values[:, 1:] = cumulative * (values[:, :1] + np.cumsum(contributions / previous, axis=1))
+    else:
+        # A -100% step zeroes the running product; step through explicitly instead.
+        current = values[:, 0]
+        for step in range(steps):
+            current = (current + contributions[:, step]) * growth[:, step]
+            values[:, step + 1] = current
+    return values
+
+
+def year_end_steps(steps: int, periods_per_year: int) -> np.ndarray:
+    # Step index at the end of every year; a trailing partial year ends at the last step.
+    years = -(-steps // periods_per_year)
+    return np.minimum(np.arange(years + 1) * periods_per_year, steps)
+
+
+def step_returns(item: Dict, resolution: str) -> np.ndarray:
+    # Prefer an asset's native periodic series; otherwise split its annual returns.
+    periodic = item.get("periodic_returns")
+    if periodic is not None and item.get("periodic_resolution"):
+        return resample_returns(periodic, item["periodic_resolution"], resolution)
+    return resample_returns(item["returns"], "annual", resolution)
+
+
+def project_steps(
+    initial_amount: float,
+    returns: ArrayLike,
+    resolution: str,
+    monthly_contribution: float = 0.0,
+    yearly_contribution: float = 0.0,
+) -> Projection:
+    periods_per_year = PERIODS_PER_YEAR[resolution]
+    steps = len(returns)
+    values = compound_growth_steps_batch(
+        initial_amount, returns, periods_per_year, monthly_contribution, yearly_contribution
+    )[0]
+    series = values[year_end_steps(steps, periods_per_year)].tolist()
+    invested = total_invested_steps(
+        initial_amount, steps, periods_per_year, monthly_contribution, yearly_contribution
+    )
+    return Projection(series, series[-1], invested, _roi(series[-1], invested))
+
+
+def compound_growth_fast(
+    initial_amount: float,
+    returns: List[float],
+    monthly_contribution: float = 0.0,
+    yearly_contribution: float = 0.0,
+) -> List[float]:
+    # Scalar form of compound_growth_batch: a single scenario is cheaper without
+    # NumPy's per-call overhead. Like the batch form it agrees with compound_growth
+    # to within one cent.
+    values = [round(initial_amount, 2)]
+    current = initial_amount
+
+    for rate in returns:
+        current = (current + yearly_contribution) * (1 + rate)
+        current += monthly_contribution * _monthly_annuity_factor_scalar(rate)
+        values.append(round(current, 2))
+
+    return values
+
+
+def project_growth(
+    initial_amount: float,
+    returns: List[float],
+    monthly_contribution: float = 0.0,
+    yearly_contribution: float = 0.0,
+) -> Projection:
+    values = compound_growth_fast(initial_amount, returns, monthly_contribution, yearly_contribution)
+    invested = total_invested(initial_amount, len(returns), monthly_contribution, yearly_contribution)
+    return Projection(values, values[-1], invested, _roi(values[-1], invested))
+
+
 def calculate_roi(
     initial_amount: float,
     returns: List[float],
     monthly_contribution: float = 0.0,
     yearly_contribution: float = 0.0,
 ) -> float:
-    values = compound_growth(initial_amount, returns, monthly_contribution, yearly_contribution)
-    final_value = values[-1]
-    years = len(returns)
-    total_invested = (
-        initial_amount
-        + yearly_contribution * years
-        + monthly_contribution * 12 * years
-    )
-    if total_invested == 0:
-        return 0.0
-    roi = (final_value - total_invested) / total_invested
-    return round(roi, 4)
+    return project_growth(initial_amount, returns, monthly_contribution, yearly_contribution).roi
 
 
 def build_portfolio_series(portfolio_items: List[Dict]) -> Tuple[List[float], List[List[float]]]:
-    if not portfolio_items:
-        return [], []
+    return build_portfolio_series_batch([portfolio_items])[0]
+
+
+def build_portfolio_series_batch(
+    portfolios: List[List[Dict]],
+) -> List[Tuple[List[float], List[List[float]]]]:
+    items = [item for portfolio_items in portfolios for item in portfolio_items]
+    if not items:
+        return [([], []) for _ in portfolios]
+
+    lengths = [len(item["returns"]) for item in items]
+    rates = np.full((len(items), max(lengths)), np.nan)
+    for row, item in enumerate(items):
+        rates[row, : lengths[row]] = item["returns"]
 
-    per_asset_series = []
-    max_years = 0
-    for item in portfolio_items:
-        series = compound_growth(
+    values = compound_growth_batch(
+        [item["amount"] for item in items],
+        rates,
+        [item.get("monthly_contribution", 0.0) for item in items],
+        [item.get("yearly_contribution", 0.0) for item in items],
+    )
+
+    results = []
+    offset = 0
+    for portfolio_items in portfolios:
+        if not portfolio_items:
+            results.append(([], []))
+            continue
+        rows = slice(offset, offset + len(portfolio_items))
+        row_lengths = lengths[rows]
+        horizon = max(row_lengths) + 1
+        per_asset_series = [
+            values[row, : length + 1].tolist() for row, length in zip(range(rows.start, rows.stop), row_lengths)
+        ]
+        total_series = np.round(values[rows, :horizon].sum(axis=0), 2).tolist()
+        results.append((total_series, per_asset_series))
+        offset = rows.stop
+
+    return results
+
+
+def _portfolio_projection(portfolio_items: List[Dict], total_series, per_asset_series) -> PortfolioProjection:
+    assets = []
+    for item, series in zip(portfolio_items, per_asset_series):
+        invested = total_invested(
             item["amount"],
-            item["returns"],
+            len(item["returns"]),
             item.get("monthly_contribution", 0.0),
             item.get("yearly_contribution", 0.0),
         )
-        per_asset_series.append(series)
-        max_years = max(max_years, len(series))
-
-    total_series = []
-    for idx in range(max_years):
-        total = 0.0
-        for series in per_asset_series:
-            if idx < len(series):
-                total += series[idx]
-            else:
-                total += series[-1]
-        total_series.append(round(total, 2))
-
-    return total_series, per_asset_series
+        assets.append(Projection(series, series[-1], invested, _roi(series[-1], invested)))
+
+    invested = sum(asset.total_invested for asset in assets)
+    final_value = total_series[-1] if total_series else 0.0
+    roi = _roi(final_value, invested) if total_series else 0.0
+    return PortfolioProjection(total_series, assets, final_value, invested, roi)
+
+
+def _project_portfolio_steps_batch(portfolios: List[List[Dict]], resolution: str) -> List[PortfolioProjection]:
+    items = [item for portfolio_items in portfolios for item in portfolio_items]
+    if not items:
+        return [PortfolioProjection([], [], 0.0, 0, 0.0) for _ in portfolios]
+
+    periods_per_year = PERIODS_PER_YEAR[resolution]
+    series_rows = [step_returns(item, resolution) for item in items]
+    lengths = [len(row) for row in series_rows]
+    rates = np.full((len(items), max(lengths)), np.nan)
+    for row, values in enumerate(series_rows):
+        rates[row, : lengths[row]] = values
+
+    values = compound_growth_steps_batch(
+        [item["amount"] for item in items],
+        rates,
+        periods_per_year,
+        [item.get("monthly_contribution", 0.0) for item in items],
+        [item.get("yearly_contribution", 0.0) for item in items],
+    )
+
+    results = []
+    offset = 0
+    for portfolio_items in portfolios:
+        if not portfolio_items:
+            results.append(PortfolioProjection([], [], 0.0, 0, 0.0))
+            continue
+        rows = range(offset, offset + len(portfolio_items))
+        assets = []
+        for row, item in zip(rows, portfolio_items):
+            series = values[row, year_end_steps(lengths[row], periods_per_year)].tolist()
+            invested = total_invested_steps(
+                item["amount"],
+                lengths[row],
+                periods_per_year,
+                item.get("monthly_contribution", 0.0),
+                item.get("yearly_contribution", 0.0),
+            )
+            assets.append(Projection(series, series[-1], invested, _roi(series[-1], invested)))
+
+        horizon = year_end_steps(max(lengths[row] for row in rows), periods_per_year)
+        total_series = np.round(values[rows.start : rows.stop][:, horizon].sum(axis=0), 2).tolist()
+        invested = sum(asset.total_invested for asset in assets)
+        results.append(
+            PortfolioProjection(total_series, assets, total_series[-1], invested, _roi(total_series[-1], invested))
+        )
+        offset = rows.stop
+
+    return results
+
+
+def project_portfolio(portfolio_items: List[Dict], resolution: str = "annual") -> PortfolioProjection:
+    return project_portfolio_batch([portfolio_items], resolution)[0]
+
+
+def project_portfolio_batch(portfolios: List[List[Dict]], resolution: str = "annual") -> List[PortfolioProjection]:
+    if resolution != "annual":
+        return _project_portfolio_steps_batch(portfolios, resolution)
+    return [
+        _portfolio_projection(portfolio_items, total_series, per_asset_series)
+        for portfolio_items, (total_series, per_asset_series) in zip(
+            portfolios, build_portfolio_series_batch(portfolios)
+        )
+    ]
@@ -1,45 +1,87 @@
 import os
-from typing import List
+from io import BytesIO
+from typing import BinaryIO, List, Optional, Union
 
-import matplotlib.pyplot as plt
+# Built on Figure/FigureCanvasAgg rather than pyplot: no global figure manager,
+# so charts can be rendered from any thread and nothing needs closing.
+CHART_TEMPLATES = {
+    "asset": {"xlabel": "Years", "ylabel": "Value ($)", "legend": True},
+    "portfolio": {
+        "xlabel": "Years",
+        "ylabel": "Total Value ($)",
+        "title": "Portfolio growth over time",
+        "legend": False,
+    },
+    "multi": {
+        "xlabel": "Years",
+        "ylabel": "Value ($)",
+        "title": "Multi-asset comparison",
+        "legend": True,
+    },
+}
 
-plt.switch_backend("Agg")
+ChartOutput = Union[str, BinaryIO]
 
 
-def _save_chart(fig, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    fig.savefig(path, bbox_inches="tight")
-    plt.close(fig)
+def load_matplotlib():
+    # Imported on first render so app startup and CLI commands don't pay for Matplotlib.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
+    return Figure, FigureCanvasAgg
 
-def generate_single_asset_chart(values: List[float], asset_name: str, output_path: str):
-    years = list(range(len(values)))
-    fig, ax = plt.subplots()
-    ax.plot(years, values, marker="o", label=asset_name)
-    ax.set_xlabel("Years")
-    ax.set_ylabel("Value ($)")
-    ax.set_title(f"Value over time - {asset_name}")
-    ax.legend()
-    _save_chart(fig, output_path)
 
+def _new_chart(kind: str, title: Optional[str] = None):
+    Figure, FigureCanvasAgg = load_matplotlib()
+    template = CHART_TEMPLATES[kind]
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.set_xlabel(template["xlabel"])
+    ax.set_ylabel(template["ylabel"])
+    ax.set_title(title or template["title"])
+    return fig, ax
 
-def generate_portfolio_chart(values: List[float], output_path: str):
-    years = list(range(len(values)))
-    fig, ax = plt.subplots()
-    ax.plot(years, values, color="green", linewidth=2.5)
-    ax.set_xlabel("Years")
-    ax.set_ylabel("Total Value ($)")
-    ax.set_title("Portfolio growth over time")
-    _save_chart(fig, output_path)
 
+def _save_chart(fig, ax, kind: str, output: ChartOutput):
+    if CHART_TEMPLATES[kind]["legend"]:
+        ax.legend()
+    if isinstance(output, str):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    fig.savefig(output, format="png", bbox_inches="tight")
 
-def generate_multi_asset_chart(series_list: List[List[float]], labels: List[str], output_path: str):
-    fig, ax = plt.subplots()
-    for values, label in zip(series_list, labels):
-        years = list(range(len(values)))
-        ax.plot(years, values, marker="o", label=label)
-    ax.set_xlabel("Years")
-    ax.set_ylabel("Value ($)")
-    ax.set_title("Multi-asset comparison")
+
+def generate_single_asset_chart(values: List[float], asset_name: str, output_path: ChartOutput):
+    fig, ax = _new_chart("asset", f"Value over time - {asset_name}")
+    ax.plot(range(len(values)), values, marker="o", label=asset_name)
+    _save_chart(fig, ax, "asset", output_path)
+
+
+def generate_portfolio_chart(values: List[float], output_path: ChartOutput):
+    fig, ax = _new_chart("portfolio")
+    ax.plot(range(len(values)), values, color="green", linewidth=2.5)
+    _save_chart(fig, ax, "portfolio", output_path)
+
+
+def generate_portfolio_band_chart(
+    values: List[float], lower: List[float], upper: List[float], output_path: ChartOutput
+):
+    fig, ax = _new_chart("portfolio")
+    years = range(len(values))
+    ax.fill_between(years, lower, upper, color="green", alpha=0.15, label="P5-P95 simulated range")
+    ax.plot(years, values, color="green", linewidth=2.5, label="Historical replay")
     ax.legend()
-    _save_chart(fig, output_path)
+    _save_chart(fig, ax, "portfolio", output_path)
+
+
+def generate_multi_asset_chart(series_list: List[List[float]], labels: List[str], output_path: ChartOutput):
+    fig, ax = _new_chart("multi")
+    for values, label in zip(series_list, labels):
+        ax.plot(range(len(values)), values, marker="o", label=label)
+    _save_chart(fig, ax, "multi", output_path)
+
+
+def render_chart_png(generator, *inputs) -> bytes:
+    buffer = BytesIO()
+    generator(*inputs, buffer)
+    return buffer.getvalue()
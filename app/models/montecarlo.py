@@ -0,0 +1,75 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .calculations import monthly_annuity_factor
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+def simulate_portfolio_paths(
+    portfolio_items: List[Dict],
+    paths: int = 10000,
+    years: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """Bootstrap yearly returns into ``paths`` scenarios and compound them like ``compound_growth``.
+
+    Every path draws one historical year per simulated year and applies it to all
+    assets at once, which keeps the co-movement between assets whose histories
+    line up. Returns total portfolio values with shape (paths, years + 1).
+    """
+    if not portfolio_items:
+        return np.zeros((paths, 1))
+
+    if years is None:
+        years = max(len(item["returns"]) for item in portfolio_items)
+
+    histories = [np.asarray(item["returns"], dtype=float) for item in portfolio_items]
+    lengths = np.array([max(len(history), 1) for history in histories])
+    rates = np.zeros((len(histories), lengths.max()))
+    for row, history in enumerate(histories):
+        rates[row, : len(history)] = history
+    growth_table = 1 + rates
+    annuity_table = monthly_annuity_factor(rates)
+
+    amounts = np.array([float(item["amount"]) for item in portfolio_items])
+    monthly = np.array([float(item.get("monthly_contribution", 0.0)) for item in portfolio_items])[:, None]
+    yearly = np.array([float(item.get("yearly_contribution", 0.0)) for item in portfolio_items])[:, None]
+
+    rng = np.random.default_rng(seed)
+    draws = rng.random((years, paths))
+    asset_rows = np.arange(len(histories))[:, None]
+
+    totals = np.empty((paths, years + 1))
+    current = np.repeat(amounts[:, None], paths, axis=1)
+    totals[:, 0] = amounts.sum()
+    for year in range(years):
+        picks = (draws[year][None, :] * lengths[:, None]).astype(np.intp)
+        current = (current + yearly) * growth_table[asset_rows, picks] + monthly * annuity_table[asset_rows, picks]
+        totals[:, year + 1] = current.sum(axis=0)
+
+    return totals
+
+
+def percentile_bands(
+    totals: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES
+) -> Dict[str, List[float]]:
+    bands = np.round(np.percentile(totals, percentiles, axis=0), 2)
+    return {f"p{percentile:g}": band.tolist() for percentile, band in zip(percentiles, bands)}
+
+
+def simulate_portfolio(
+    portfolio_items: List[Dict],
+    paths: int = 10000,
+    years: Optional[int] = None,
+    seed: Optional[int] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> Dict:
+    totals = simulate_portfolio_paths(portfolio_items, paths, years, seed)
+    return {
+        "paths": paths,
+        "years": totals.shape[1] - 1,
+        "seed": seed,
+        "percentiles": percentile_bands(totals, percentiles),
+    }
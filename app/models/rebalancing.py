@@ -0,0 +1,171 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .calculations import (
+    PERIODS_PER_YEAR,
+    _roi,
+    grow_steps,
+    step_returns,
+    step_schedule,
+    total_invested_steps,
+    year_end_steps,
+)
+
+REBALANCE_POLICIES = ("calendar", "threshold")
+# Months between calendar rebalances.
+REBALANCE_FREQUENCIES = {"monthly": 1, "quarterly": 3, "semiannual": 6, "annual": 12}
+
+
+def target_weights(portfolio_items: List[Dict]) -> np.ndarray:
+    """Each holding's ``percent`` as a weight; amount-weighted when no percent is set."""
+    percents = np.array([float(item.get("percent") or 0.0) for item in portfolio_items])
+    if percents.sum() > 0:
+        return percents / percents.sum()
+    amounts = np.array([float(item["amount"]) for item in portfolio_items])
+    if amounts.sum() > 0:
+        return amounts / amounts.sum()
+    return np.full(len(portfolio_items), 1 / len(portfolio_items))
+
+
+def _live_targets(targets: np.ndarray, live: np.ndarray) -> np.ndarray:
+    # Targets renormalised over the assets whose history has not ended; zero elsewhere.
+    weights = np.where(live, targets, 0.0)
+    total = weights.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, weights / total, 0.0)
+
+
+def _next_breach(segment: np.ndarray, targets: np.ndarray, live: np.ndarray, threshold: float) -> Optional[int]:
+    # First step (1-based within the segment) where a live weight drifts past the threshold.
+    held = np.where(live, segment[:, 1:], 0.0)
+    totals = held.sum(axis=0)
+    goals = _live_targets(targets[:, None], live)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drift = np.abs(held / totals - goals).max(axis=0)
+    breached = np.flatnonzero((totals > 0) & (goals.sum(axis=0) > 0) & (drift > threshold))
+    return int(breached[0]) + 1 if len(breached) else None
+
+
+def simulate_rebalancing(
+    portfolio_items: List[Dict],
+    policy: str = "calendar",
+    frequency: str = "annual",
+    threshold: float = 0.05,
+    resolution: str = "monthly",
+) -> Dict:
+    """Project a portfolio that is periodically traded back to its target weights.
+
+    ``calendar`` rebalances at the end of every ``frequency`` period; ``threshold``
+    rebalances at the end of any step where a weight has drifted more than
+    ``threshold`` (0.05 = 5 percentage points) from its target. Contributions follow
+    each holding's own plan, as in ``compound_growth_steps_batch``. Between two
+    rebalances every asset compounds independently, so each segment is one
+    vectorized (assets, steps) pass and only rebalance events are looped over.
+    Annual returns are split into monthly steps. A holding whose history has ended
+    keeps its last value and drops out of the targets, which are renormalised over
+    the holdings still running.
+    """
+    if policy not in REBALANCE_POLICIES:
+        raise ValueError(f"Unsupported rebalancing policy '{policy}'. Use one of: {', '.join(REBALANCE_POLICIES)}")
+    if policy == "calendar" and frequency not in REBALANCE_FREQUENCIES:
+        raise ValueError(
+            f"Unsupported rebalancing frequency '{frequency}'. Use one of: {', '.join(REBALANCE_FREQUENCIES)}"
+        )
+    if policy == "threshold" and not 0 < threshold < 1:
+        raise ValueError("threshold must be between 0 and 1 (0.05 = 5 percentage points)")
+
+    resolution = "monthly" if resolution == "annual" else resolution
+    periods_per_year = PERIODS_PER_YEAR[resolution]
+    result = {"policy": policy, "resolution": resolution}
+    result.update({"frequency": frequency} if policy == "calendar" else {"threshold": threshold})
+    if not portfolio_items:
+        return {
+            **result,
+            "yearly_values": [],
+            "per_asset_series": {},
+            "final_value": 0.0,
+            "total_invested": 0,
+            "roi": 0.0,
+            "rebalances": 0,
+            "turnover": 0.0,
+            "annual_turnover": 0.0,
+        }
+
+    series_rows = [step_returns(item, resolution) for item in portfolio_items]
+    lengths = np.array([len(row) for row in series_rows])
+    steps = int(lengths.max())
+    rates = np.full((len(portfolio_items), steps), np.nan)
+    for row, values in enumerate(series_rows):
+        rates[row, : lengths[row]] = values
+    growth, contributions = step_schedule(
+        rates,
+        periods_per_year,
+        np.array([float(item.get("monthly_contribution", 0.0)) for item in portfolio_items]),
+        np.array([float(item.get("yearly_contribution", 0.0)) for item in portfolio_items]),
+    )
+    targets = target_weights(portfolio_items)
+
+    values = np.empty((len(portfolio_items), steps + 1))
+    values[:, 0] = [float(item["amount"]) for item in portfolio_items]
+    interval = REBALANCE_FREQUENCIES.get(frequency, 12) * periods_per_year // 12
+    window = periods_per_year
+    rebalances, traded, turnover = 0, 0.0, 0.0
+
+    start = 0
+    while start < steps:
+        if policy == "calendar":
+            end = min(steps, (start // interval + 1) * interval)
+            values[:, start : end + 1] = grow_steps(values[:, start], growth[:, start:end], contributions[:, start:end])
+        else:
+            # Grow a window ahead, cut it at the first breach, and widen it while none turns up.
+            stop = min(steps, start + window)
+            segment = grow_steps(values[:, start], growth[:, start:stop], contributions[:, start:stop])
+            live = lengths[:, None] > np.arange(start + 1, stop + 1)
+            breach = _next_breach(segment, targets, live, threshold)
+            end = start + breach if breach else stop
+            values[:, start : end + 1] = segment[:, : end - start + 1]
+            if breach is None:
+                window *= 2
+                start = end
+                continue
+            window = periods_per_year
+
+        live = lengths > end
+        goals = _live_targets(targets, live)
+        live_total = values[live, end].sum()
+        if end < steps and live_total > 0 and goals.any():
+            trade = np.abs(live_total * goals[live] - values[live, end]).sum() / 2
+            values[live, end] = live_total * goals[live]
+            rebalances += 1
+            traded += trade
+            turnover += trade / values[:, end].sum()
+        start = end
+
+    values = np.round(values, 2)
+    year_ends = year_end_steps(steps, periods_per_year)
+    total_series = np.round(values[:, year_ends].sum(axis=0), 2).tolist()
+    invested = sum(
+        total_invested_steps(
+            item["amount"],
+            length,
+            periods_per_year,
+            item.get("monthly_contribution", 0.0),
+            item.get("yearly_contribution", 0.0),
+        )
+        for item, length in zip(portfolio_items, lengths)
+    )
+    return {
+        **result,
+        "yearly_values": total_series,
+        "per_asset_series": {
+            item["name"]: values[row, year_ends].tolist() for row, item in enumerate(portfolio_items)
+        },
+        "final_value": total_series[-1],
+        "total_invested": invested,
+        "roi": _roi(total_series[-1], invested),
+        "rebalances": rebalances,
+        # One-way traded value, and the average fraction of the portfolio traded per year.
+        "turnover": round(traded, 2),
+        "annual_turnover": round(turnover / (steps / periods_per_year), 4) if steps else 0.0,
+    }
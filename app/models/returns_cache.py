@@ -0,0 +1,94 @@
+import hashlib
+import json
+import sys
+from array import array
+from threading import Lock
+from typing import Dict, Hashable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Returns are stored as packed little-endian float64 so they can be read straight into arrays.
+RETURNS_DTYPE = np.dtype("<f8")
+
+RawReturns = Union[str, bytes, None]
+
+
+def pack_returns(values: Sequence[float]) -> bytes:
+    return np.asarray(values, dtype=RETURNS_DTYPE).tobytes()
+
+
+def unpack_returns(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=RETURNS_DTYPE)
+
+
+def parse_returns(raw: RawReturns) -> array:
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        values = array("d")
+        values.frombytes(bytes(raw))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+    return array("d", json.loads(raw or "[]"))
+
+
+def returns_version(raw: RawReturns) -> str:
+    data = bytes(raw) if isinstance(raw, (bytes, bytearray, memoryview)) else (raw or "").encode()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def periodic_key(asset_id: int) -> Tuple[str, int]:
+    return ("periodic", asset_id)
+
+
+class ReturnsCache:
+    """Process-wide cache of parsed return vectors, keyed by asset id and content hash.
+
+    Periodic (monthly/daily) series share the cache under ``periodic_key(asset_id)``.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[str, array]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, asset_id: Optional[Hashable], raw: RawReturns) -> array:
+        if asset_id is None:
+            return parse_returns(raw)
+
+        version = returns_version(raw)
+        entry = self._entries.get(asset_id)
+        if entry is not None and entry[0] == version:
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+
+        values = parse_returns(raw)
+        with self._lock:
+            self.misses += 1
+            self._entries[asset_id] = (version, values)
+        return values
+
+    def version(self, asset_id: Hashable) -> Optional[str]:
+        entry = self._entries.get(asset_id)
+        return entry[0] if entry else None
+
+    def invalidate(self, asset_id: Optional[int] = None):
+        with self._lock:
+            if asset_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(asset_id, None)
+                self._entries.pop(periodic_key(asset_id), None)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+returns_cache = ReturnsCache()
@@ -1,18 +1,27 @@
-from datetime import datetime
-from pathlib import Path
+from io import BytesIO
 
-from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, send_file, url_for
 from flask_login import current_user, login_required
 
-from .models import Asset, UserAsset, recalculate_allocations
-from .models.calculations import build_portfolio_series, calculate_roi, compound_growth
-from .models.charts import (
-    generate_multi_asset_chart,
-    generate_portfolio_chart,
-    generate_single_asset_chart,
-)
+from .models import Asset, UserAsset, add_user_asset, apply_allocation_change
+from .models.calculations import project_growth
+from .models.charts import render_chart_png
 from . import db
-from .config import Config
+from .metrics import span
+from .services.chart_cache import render_charts
+from .services.portfolio import (
+    get_user_holdings,
+    holdings_fingerprint,
+    portfolio_items_from_holdings,
+    stored_projection,
+)
+from .services.precompute import (
+    artifact_version,
+    build_chart_artifacts,
+    chart_inputs,
+    chart_requests,
+    precompute_queue,
+)
 
 main_bp = Blueprint("main", __name__)
 
@@ -28,8 +37,10 @@ def index():
         yearly_rate = float(request.form.get("yearly_rate", 0)) / 100
         years = int(request.form.get("years", 1))
         returns = [yearly_rate for _ in range(years)]
-        yearly_values = compound_growth(initial_amount, returns)
-        roi_result = calculate_roi(initial_amount, returns)
+        with span("calc"):
+            projection = project_growth(initial_amount, returns)
+        yearly_values = projection.series
+        roi_result = projection.roi
 
     return render_template(
         "index.html",
@@ -56,11 +67,13 @@ def portfolio():
             if not user_asset:
                 flash("Investment not found", "danger")
                 return redirect(url_for("main.portfolio"))
+            invested_delta = invested_amount - user_asset.invested_amount
             user_asset.invested_amount = invested_amount
             user_asset.monthly_contribution = monthly_contribution
             user_asset.yearly_contribution = yearly_contribution
+            apply_allocation_change(current_user.id, invested_delta)
             db.session.commit()
-            recalculate_allocations(current_user.id)
+            precompute_queue.enqueue(current_user.id)
             flash("Investment updated", "success")
             return redirect(url_for("main.portfolio"))
 
@@ -75,27 +88,20 @@ def portfolio():
             flash("Invalid asset", "danger")
             return redirect(url_for("main.portfolio"))
 
-        user_asset = UserAsset.query.filter_by(user_id=current_user.id, asset_id=asset_id_int).first()
-        if user_asset:
+        added = add_user_asset(
+            current_user.id, asset_id_int, invested_amount, monthly_contribution, yearly_contribution
+        )
+        if not added:
             flash("Asset already in your portfolio. Adjust it directly in the cards below.", "warning")
             return redirect(url_for("main.portfolio"))
 
-        user_asset = UserAsset(
-            user_id=current_user.id,
-            asset_id=asset_id_int,
-            invested_amount=invested_amount,
-            monthly_contribution=monthly_contribution,
-            yearly_contribution=yearly_contribution,
-        )
-        db.session.add(user_asset)
+        apply_allocation_change(current_user.id, invested_amount)
         db.session.commit()
-        recalculate_allocations(current_user.id)
+        precompute_queue.enqueue(current_user.id)
         flash("Asset added to portfolio", "success")
         return redirect(url_for("main.portfolio"))
 
-    user_assets = (
-        UserAsset.query.filter_by(user_id=current_user.id).all() if current_user.is_authenticated else []
-    )
+    user_assets = get_user_holdings(current_user.id) if current_user.is_authenticated else []
     totals = {
         "invested": sum(asset.invested_amount for asset in user_assets),
         "monthly": sum(asset.monthly_contribution for asset in user_assets),
@@ -112,8 +118,9 @@ def delete_investment(user_asset_id):
     if not user_asset:
         abort(404)
     db.session.delete(user_asset)
+    apply_allocation_change(current_user.id, -user_asset.invested_amount)
     db.session.commit()
-    recalculate_allocations(current_user.id)
+    precompute_queue.enqueue(current_user.id)
     flash("Investment removed. Re-add the asset if you wish to set it up again.", "info")
     return redirect(url_for("main.portfolio"))
 
@@ -121,53 +128,43 @@ def delete_investment(user_asset_id):
 @main_bp.route("/charts")
 @login_required
 def charts():
-    user_assets = UserAsset.query.filter_by(user_id=current_user.id).all()
+    user_assets = get_user_holdings(current_user.id)
     if not user_assets:
         flash("Add at least one asset to your portfolio to unlock insights.", "warning")
         return redirect(url_for("main.portfolio"))
 
-    chart_dir = Path(Config.CHART_OUTPUT_DIR)
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    portfolio_items = portfolio_items_from_holdings(user_assets)
+    client_mode = current_app.config["CHART_DELIVERY"] == "client"
+    stream_mode = current_app.config["CHART_STREAM_IMAGES"]
+
+    # Portfolio edits queue a background recompute; render inline only until it has run.
+    fingerprint = holdings_fingerprint(user_assets)
+    artifacts = precompute_queue.load(current_user.id, artifact_version(fingerprint))
+    if artifacts is None:
+        artifacts = build_chart_artifacts(portfolio_items, stored_projection(current_user.id, fingerprint))
+        # Also covers changed asset returns, which no portfolio edit enqueues.
+        precompute_queue.enqueue(current_user.id, requeue=False)
+    charts = artifacts["charts"]
+    asset_charts, portfolio_chart, multi_chart = charts["assets"], charts["portfolio"], charts["multi"]
+    bands = artifacts["bands"]
 
-    portfolio_items = []
-    asset_charts = []
     asset_insights = []
-    for index, user_asset in enumerate(user_assets):
+    for index, (user_asset, item, asset_projection, asset_chart) in enumerate(
+        zip(user_assets, portfolio_items, artifacts["assets"], asset_charts)
+    ):
         asset = user_asset.asset
-        returns = asset.historical_returns
-        portfolio_items.append(
-            {
-                "amount": user_asset.invested_amount,
-                "returns": returns,
-                "name": asset.name,
-                "monthly_contribution": user_asset.monthly_contribution,
-                "yearly_contribution": user_asset.yearly_contribution,
-            }
-        )
-        values = compound_growth(
-            user_asset.invested_amount,
-            returns,
-            user_asset.monthly_contribution,
-            user_asset.yearly_contribution,
-        )
-        asset_chart_path = chart_dir / f"asset_{asset.id}_{timestamp}.png"
-        generate_single_asset_chart(values, asset.name, str(asset_chart_path))
-        asset_charts.append(asset_chart_path.name)
+        returns = item["returns"]
         years = len(returns)
-        total_contrib = (
-            user_asset.invested_amount
-            + user_asset.monthly_contribution * 12 * years
-            + user_asset.yearly_contribution * years
-        )
         best_year = max(returns)
         worst_year = min(returns)
         asset_insights.append(
             {
-                "chart": asset_chart_path.name,
+                "chart": asset_chart,
+                "index": index,
                 "title": asset.name,
                 "details": [
                     f"{asset.name} compounds {years} curated annual data points blended with a €{user_asset.monthly_contribution:,.0f} monthly plan and €{user_asset.yearly_contribution:,.0f} yearly top-up.",
-                    f"Entry level: €{user_asset.invested_amount:,.2f} deployed today with cumulative contributions of €{total_contrib:,.2f}. The curve currently targets €{values[-1]:,.2f} by year {years}.",
+                    f"Entry level: €{user_asset.invested_amount:,.2f} deployed today with cumulative contributions of €{asset_projection['total_invested']:,.2f}. The curve currently targets €{asset_projection['final_value']:,.2f} by year {years}.",
                     f"Momentum: best recorded season prints {(best_year * 100):.1f}% while the defensive scenario sits at {(worst_year * 100):.1f}%. The line in the chart mirrors those swings.",
                     "Pricing note: these simulations assume execution at internal model prices; adjust once live quotes are connected.",
                     "Catalysts: recurring cash-in maintains slope even during pullbacks, helping the strategy buy lows and smooth drawdowns.",
@@ -176,29 +173,18 @@ def charts():
             }
         )
 
-    total_series, per_asset_series = build_portfolio_series(portfolio_items)
-
-    portfolio_chart_path = chart_dir / f"portfolio_{current_user.id}_{timestamp}.png"
-    multi_chart_path = chart_dir / f"multi_{current_user.id}_{timestamp}.png"
-
-    generate_portfolio_chart(total_series, str(portfolio_chart_path))
-    generate_multi_asset_chart(per_asset_series, [item["name"] for item in portfolio_items], str(multi_chart_path))
-
-    total_contributions = sum(
-        item["amount"]
-        + item["monthly_contribution"] * 12 * len(item["returns"])
-        + item["yearly_contribution"] * len(item["returns"])
-        for item in portfolio_items
-    )
-    ending_value = total_series[-1] if total_series else 0
-    horizon = len(total_series) - 1 if total_series else 0
+    total_contributions = artifacts["total_invested"]
+    ending_value = artifacts["final_value"]
+    horizon = artifacts["horizon"]
     top_asset_index = (
-        max(range(len(per_asset_series)), key=lambda idx: per_asset_series[idx][-1]) if per_asset_series else 0
+        max(range(len(artifacts["assets"])), key=lambda idx: artifacts["assets"][idx]["final_value"])
+        if artifacts["assets"]
+        else 0
     )
     top_asset_name = portfolio_items[top_asset_index]["name"] if portfolio_items else ""
 
     portfolio_insight = {
-        "chart": portfolio_chart_path.name,
+        "chart": portfolio_chart,
         "title": "Portfolio growth",
         "details": [
             f"Total contributions across strategies amount to €{total_contributions:,.2f}; projected value reaches €{ending_value:,.2f} over {horizon} years.",
@@ -208,9 +194,14 @@ def charts():
         ],
         "collapse_id": "portfolioInsight",
     }
+    if bands:
+        portfolio_insight["details"].insert(
+            1,
+            f"Resampling the historical years {current_app.config['MONTE_CARLO_CHART_PATHS']:,} times puts year {horizon} between €{bands['p5']:,.2f} (P5) and €{bands['p95']:,.2f} (P95), median €{bands['p50']:,.2f}; the shaded band shows that range.",
+        )
 
     multi_insight = {
-        "chart": multi_chart_path.name,
+        "chart": multi_chart,
         "title": "Multi-asset overlay",
         "details": [
             "Each colored line mirrors a specific asset’s compounding path so you can spot dispersion instantly.",
@@ -222,10 +213,57 @@ def charts():
 
     return render_template(
         "charts.html",
-        portfolio_chart=portfolio_chart_path.name,
-        multi_chart=multi_chart_path.name,
+        client_mode=client_mode,
+        stream_mode=stream_mode,
+        portfolio_chart=portfolio_chart,
+        multi_chart=multi_chart,
         asset_charts=asset_charts,
         asset_insights=asset_insights,
         portfolio_insight=portfolio_insight,
         multi_insight=multi_insight,
     )
+
+
+@main_bp.route("/charts/image/<kind>")
+@main_bp.route("/charts/image/<kind>/<int:index>")
+@login_required
+def chart_image(kind, index=None):
+    user_assets = get_user_holdings(current_user.id)
+    if not user_assets:
+        abort(404)
+    if kind == "asset" and index is not None and 0 <= index < len(user_assets):
+        position = index
+    elif kind == "portfolio" and index is None:
+        position = -2
+    elif kind == "multi" and index is None:
+        position = -1
+    else:
+        abort(404)
+
+    stream_mode = current_app.config["CHART_STREAM_IMAGES"]
+    if stream_mode:
+        # The holdings, their asset returns and the chart settings determine the image,
+        # so a revalidation is answered before anything is projected or simulated.
+        version = artifact_version(holdings_fingerprint(user_assets))
+        etag = "-".join(str(part) for part in (version, kind, index) if part is not None)
+        if etag in request.if_none_match:
+            return "", 304
+
+    portfolio_items, projection, bands = chart_inputs(current_user.id, user_assets, with_bands=kind == "portfolio")
+    chart_request = chart_requests(portfolio_items, projection, bands)[position]
+
+    if stream_mode:
+        _, generator, inputs = chart_request
+        with span("chart"):
+            png = render_chart_png(generator, *inputs)
+        response = send_file(BytesIO(png), mimetype="image/png")
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    with span("chart"):
+        filename = render_charts([chart_request])[0]
+    if filename is None:
+        abort(503)
+    return redirect(url_for("static", filename=f"charts/{filename}"))
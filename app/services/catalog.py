@@ -0,0 +1,82 @@
+import time
+from array import array
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import event
+
+from ..models import Asset
+
+
+@dataclass(frozen=True)
+class CatalogAsset:
+    id: int
+    name: str
+    default_amount: float
+    historical_returns: array
+    returns_version: str
+
+
+class AssetCatalog:
+    """In-memory name/id index over the asset table, reloaded on change or after a TTL."""
+
+    def __init__(self):
+        self._by_name: Dict[str, CatalogAsset] = {}
+        self._by_id: Dict[int, CatalogAsset] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale = True
+        self._lock = Lock()
+
+    def load(self):
+        entries = [
+            CatalogAsset(
+                id=asset.id,
+                name=asset.name,
+                default_amount=asset.default_amount,
+                historical_returns=asset.historical_returns,
+                returns_version=asset.returns_version,
+            )
+            for asset in Asset.query.all()
+        ]
+        with self._lock:
+            self._by_name = {entry.name: entry for entry in entries}
+            self._by_id = {entry.id: entry for entry in entries}
+            self._loaded_at = time.monotonic()
+            self._stale = False
+
+    def invalidate(self):
+        self._stale = True
+
+    def _ensure_fresh(self):
+        ttl = current_app.config["ASSET_CATALOG_TTL"]
+        if self._stale or self._loaded_at is None or time.monotonic() - self._loaded_at > ttl:
+            self.load()
+
+    def get_by_name(self, name: str) -> Optional[CatalogAsset]:
+        self._ensure_fresh()
+        return self._by_name.get(name)
+
+    def get_by_id(self, asset_id: int) -> Optional[CatalogAsset]:
+        self._ensure_fresh()
+        return self._by_id.get(asset_id)
+
+    def resolve_names(self, names: Iterable[str]) -> Dict[str, CatalogAsset]:
+        self._ensure_fresh()
+        by_name = self._by_name
+        return {name: by_name[name] for name in names if name in by_name}
+
+    def all(self) -> List[CatalogAsset]:
+        self._ensure_fresh()
+        return list(self._by_id.values())
+
+
+asset_catalog = AssetCatalog()
+
+
+@event.listens_for(Asset, "after_insert")
+@event.listens_for(Asset, "after_update")
+@event.listens_for(Asset, "after_delete")
+def _invalidate_catalog(mapper, connection, target):
+    asset_catalog.invalidate()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from .chart_renderer import chart_renderer
+
+# Bump when chart styling changes so previously rendered files are not reused.
+CHART_STYLE_VERSION = 1
+EVICTION_INTERVAL = 60.0
+STALE_TEMP_AGE = 3600.0
+
+_last_eviction = 0.0
+
+
+def chart_filename(kind: str, *inputs) -> str:
+    payload = json.dumps([CHART_STYLE_VERSION, kind, inputs], separators=(",", ":"), default=float)
+    digest = hashlib.sha256(payload.encode()).hexdigest()[:24]
+    return f"{kind}_{digest}.png"
+
+
+def render_charts(requests: List[Tuple[str, Callable, Sequence]]) -> List[Optional[str]]:
+    """Return a file name per ``(kind, generator, inputs)``; only missing charts are rendered.
+
+    Missing charts are rendered together through the chart renderer pool. A chart that
+    fails or times out comes back as ``None``.
+    """
+    config = current_app.config
+    chart_dir = Path(config["CHART_OUTPUT_DIR"])
+    filenames: List[Optional[str]] = []
+    pending = []
+    for kind, generator, inputs in requests:
+        filename = chart_filename(kind, *inputs)
+        path = chart_dir / filename
+        filenames.append(filename)
+        if path.exists():
+            os.utime(path)
+            continue
+        pending.append((len(filenames) - 1, generator, inputs, path))
+
+    if not pending:
+        return filenames
+
+    # Unique per process and thread: the precompute worker may render the same chart as a request.
+    suffix = f"{os.getpid()}.{threading.get_ident()}"
+    jobs = [
+        (generator, inputs, str(chart_dir / f".{path.name}.{suffix}.png"))
+        for _, generator, inputs, path in pending
+    ]
+    results = chart_renderer.render_many(
+        jobs,
+        workers=config["CHART_RENDER_WORKERS"],
+        timeout=config["CHART_RENDER_TIMEOUT"],
+        start_method=config["CHART_RENDER_START_METHOD"],
+    )
+    for (index, _, _, path), (_, _, tmp_path), rendered in zip(pending, jobs, results):
+        if rendered:
+            os.replace(tmp_path, path)
+        else:
+            filenames[index] = None
+    return filenames
+
+
+def evict_charts(chart_dir=None, max_files=None, max_bytes=None, max_age=None) -> int:
+    config = current_app.config
+    chart_dir = Path(chart_dir or config["CHART_OUTPUT_DIR"])
+    max_files = config["CHART_CACHE_MAX_FILES"] if max_files is None else max_files
+    max_bytes = config["CHART_CACHE_MAX_BYTES"] if max_bytes is None else max_bytes
+    max_age = config["CHART_CACHE_MAX_AGE"] if max_age is None else max_age
+
+    now = time.time()
+    entries = []
+    for path in chart_dir.glob("*.png"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.name.startswith("."):
+            # Leftover from a render that timed out or crashed before being renamed.
+            if now - stat.st_mtime > STALE_TEMP_AGE:
+                path.unlink(missing_ok=True)
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort(reverse=True)
+
+    kept_files = kept_bytes = removed = 0
+    for mtime, size, path in entries:
+        expired = max_age and now - mtime > max_age
+        over_budget = kept_files + 1 > max_files or kept_bytes + size > max_bytes
+        if expired or over_budget:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            continue
+        kept_files += 1
+        kept_bytes += size
+    return removed
+
+
+def maybe_evict_charts() -> int:
+    global _last_eviction
+    now = time.monotonic()
+    if now - _last_eviction < EVICTION_INTERVAL:
+        return 0
+    _last_eviction = now
+    return evict_charts()
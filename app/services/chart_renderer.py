@@ -0,0 +1,126 @@
+import atexit
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+RenderJob = Tuple[Callable, Sequence, str]
+
+
+def _init_worker():
+    # Pay the Matplotlib import once per worker, not on its first chart.
+    from ..models.charts import load_matplotlib
+
+    load_matplotlib()
+
+
+def _warmup():
+    return True
+
+
+def _render(generator: Callable, inputs: Sequence, output_path: str):
+    generator(*inputs, output_path)
+
+
+class ChartRenderer:
+    """Renders charts in a warm process pool so CPU-bound Agg rendering runs in parallel."""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+        self._lock = Lock()
+
+    def _get_executor(self, workers: int, start_method: Optional[str]) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._workers != workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context(start_method),
+                    initializer=_init_worker,
+                )
+                self._workers = workers
+            return self._executor
+
+    def warm(self, workers: int, start_method: Optional[str] = None):
+        if workers <= 0:
+            return
+        executor = self._get_executor(workers, start_method)
+        for future in [executor.submit(_warmup) for _ in range(workers)]:
+            future.result()
+
+    def shutdown(self, terminate: bool = False):
+        """Drop the pool; with ``terminate`` also kill workers still busy with a render."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # shutdown() forgets the worker processes, so collect them first.
+        processes = list((getattr(executor, "_processes", None) or {}).values()) if terminate else []
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def _render_inline(self, jobs: List[RenderJob]) -> List[bool]:
+        # No timeout here: a single chart is not worth the round trip to a worker.
+        results = []
+        for generator, inputs, output_path in jobs:
+            try:
+                _render(generator, inputs, output_path)
+                results.append(True)
+            except Exception:
+                logger.exception("Chart %s failed to render via %s", output_path, generator.__name__)
+                results.append(False)
+        return results
+
+    def render_many(
+        self,
+        jobs: List[RenderJob],
+        workers: int,
+        timeout: float,
+        start_method: Optional[str] = None,
+    ) -> List[bool]:
+        if workers <= 0 or len(jobs) <= 1:
+            return self._render_inline(jobs)
+
+        try:
+            executor = self._get_executor(workers, start_method)
+            futures = [executor.submit(_render, generator, inputs, path) for generator, inputs, path in jobs]
+        except BrokenProcessPool:
+            self.shutdown()
+            return self.render_many(jobs, 0, timeout)
+
+        deadline = time.monotonic() + timeout
+        results = []
+        timed_out = False
+        for future, (generator, _, output_path) in zip(futures, jobs):
+            try:
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
+                results.append(True)
+            except FutureTimeoutError:
+                timed_out = True
+                logger.warning("Chart %s timed out after %.1fs", output_path, timeout)
+                results.append(False)
+            except BrokenProcessPool:
+                self.shutdown()
+                logger.warning("Chart worker pool broke while rendering %s", output_path)
+                results.append(False)
+            except Exception:
+                logger.exception("Chart %s failed to render via %s", output_path, generator.__name__)
+                results.append(False)
+        if timed_out:
+            # Cancelling a future does not stop a render already running in a worker;
+            # recycle the pool so a hung render cannot hold a worker forever.
+            self.shutdown(terminate=True)
+        return results
+
+
+chart_renderer = ChartRenderer()
+atexit.register(chart_renderer.shutdown)
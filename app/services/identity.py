@@ -0,0 +1,121 @@
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from flask import Flask
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from werkzeug.utils import import_string
+
+from .. import db, login_manager
+from ..caching import LRUCache
+from ..models import User
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "roi_planner:user:"
+
+
+@dataclass(frozen=True)
+class CachedUser(UserMixin):
+    """The fields request handlers read from ``current_user``, detached from any session."""
+
+    id: int
+    username: str
+    email: str
+    role: Optional[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, username=user.username, email=user.email, role=user.role)
+
+
+class IdentityCache:
+    """Signed-in users for the Flask-Login loader: a bounded local LRU with a short TTL,
+    optionally backed by a shared store.
+
+    The shared backend only needs redis-style ``get(key)``, ``set(key, value, ex=seconds)``
+    and ``delete(key)``, so a ``redis.Redis`` client works as is.
+    """
+
+    def __init__(self):
+        self.local = LRUCache()
+        self.backend = None
+        self.ttl = 0.0
+
+    def init_app(self, app: Flask):
+        config = app.config
+        self.ttl = config["IDENTITY_CACHE_TTL"]
+        self.local.configure(config["IDENTITY_CACHE_SIZE"] if self.ttl > 0 else 0, self.ttl or None)
+        factory = config["IDENTITY_CACHE_BACKEND"]
+        self.backend = import_string(factory)(app) if factory and self.ttl > 0 else None
+
+    def _backend_call(self, method: str, *args, **kwargs):
+        try:
+            return getattr(self.backend, method)(*args, **kwargs)
+        except Exception:
+            # A shared cache outage must not log everyone out; fall through to the database.
+            logger.warning("Identity cache backend %s failed", method, exc_info=True)
+            return None
+
+    def load(self, user_id: int) -> Optional[CachedUser]:
+        entry = self.local.get(user_id)
+        if entry is not None:
+            return entry
+
+        if self.backend is not None:
+            raw = self._backend_call("get", f"{KEY_PREFIX}{user_id}")
+            if raw is not None:
+                entry = CachedUser(**json.loads(raw))
+                self.local.set(user_id, entry)
+                return entry
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        entry = CachedUser.from_user(user)
+        self.local.set(user_id, entry)
+        if self.backend is not None:
+            self._backend_call("set", f"{KEY_PREFIX}{user_id}", json.dumps(asdict(entry)), ex=max(1, int(self.ttl)))
+        return entry
+
+    def invalidate(self, user_id: int):
+        self.local.delete(user_id)
+        if self.backend is not None:
+            self._backend_call("delete", f"{KEY_PREFIX}{user_id}")
+
+
+identity_cache = IdentityCache()
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return identity_cache.load(int(user_id))
+
+
+PENDING_KEY = "identity_cache_invalidations"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_identity(mapper, connection, target):
+    # Role, password and profile changes all land here. Dropping the entry at flush
+    # keeps this session's later reads fresh, but a concurrent request could cache
+    # the still-committed row again before the commit, so drop it once more after.
+    identity_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_identities(session):
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        identity_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_identities(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,150 @@
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from .. import db
+from ..metrics import span
+from ..models import Asset, PortfolioSnapshot, User, UserAsset, load_periodic_returns, load_return_matrix
+from ..models.calculations import PortfolioProjection, project_portfolio
+from ..models.montecarlo import simulate_portfolio
+
+
+def _holdings_query():
+    return UserAsset.query.options(joinedload(UserAsset.asset)).order_by(UserAsset.id)
+
+
+def get_user_holdings(user_id: int) -> List[UserAsset]:
+    return _holdings_query().filter(UserAsset.user_id == user_id).all()
+
+
+def get_holdings_for_users(user_ids: Iterable[int]) -> Tuple[Dict[int, List[UserAsset]], Dict[int, np.ndarray]]:
+    """Holdings per user plus the return vector of every asset they hold.
+
+    Returns come from ``load_return_matrix`` as rows of one matrix in a single
+    query, so the holdings query leaves the packed column unloaded.
+    """
+    holdings = {user_id: [] for user_id in user_ids}
+    if not holdings:
+        return holdings, {}
+    query = UserAsset.query.options(
+        joinedload(UserAsset.asset).defer(Asset.historical_returns_blob)
+    ).order_by(UserAsset.id)
+    for user_asset in query.filter(UserAsset.user_id.in_(holdings)).all():
+        holdings[user_asset.user_id].append(user_asset)
+
+    asset_ids = {item.asset_id for user_assets in holdings.values() for item in user_assets}
+    ids, matrix, lengths = load_return_matrix(asset_ids) if asset_ids else ([], None, [])
+    returns = {asset_id: matrix[row, :length] for row, (asset_id, length) in enumerate(zip(ids, lengths))}
+    return holdings, returns
+
+
+def portfolio_items_from_holdings(
+    user_assets: Iterable[UserAsset], returns: Optional[Dict[int, np.ndarray]] = None
+) -> List[Dict]:
+    """Calculator inputs for holdings; ``returns`` overrides each asset's cached vector."""
+    return [
+        {
+            "asset_id": item.asset_id,
+            "amount": item.invested_amount,
+            "returns": returns[item.asset_id] if returns is not None else item.asset.historical_returns,
+            "name": item.asset.name,
+            "percent": item.allocation_percent,
+            "monthly_contribution": item.monthly_contribution,
+            "yearly_contribution": item.yearly_contribution,
+        }
+        for item in user_assets
+    ]
+
+
+def holdings_fingerprint(user_assets: Iterable[UserAsset]) -> str:
+    """Content hash of everything a holding contributes to projections and charts."""
+    payload = [
+        (
+            item.asset_id,
+            item.asset.name,
+            item.asset.returns_version,
+            item.invested_amount,
+            item.monthly_contribution,
+            item.yearly_contribution,
+        )
+        for item in user_assets
+    ]
+    return hashlib.blake2b(json.dumps(payload).encode(), digest_size=12).hexdigest()
+
+
+def get_portfolio_snapshot(user_id: int) -> PortfolioSnapshot:
+    """The user's stored projection: one lookup, rebuilt only when missing or stale.
+
+    Holding and asset changes bump the user's holdings version, so a row whose
+    version still matches was built from the current holdings.
+    """
+    snapshot = db.session.execute(
+        select(PortfolioSnapshot)
+        .join(User, User.id == PortfolioSnapshot.user_id)
+        .where(PortfolioSnapshot.user_id == user_id, PortfolioSnapshot.holdings_version == User.holdings_version)
+    ).scalar_one_or_none()
+    return snapshot if snapshot is not None else refresh_portfolio_snapshot(user_id)
+
+
+def stored_projection(user_id: int, fingerprint: str) -> Optional[PortfolioProjection]:
+    """The snapshot's projection if it was built from ``fingerprint``; never writes."""
+    snapshot = db.session.get(PortfolioSnapshot, user_id)
+    if snapshot is None or snapshot.fingerprint != fingerprint:
+        return None
+    return snapshot.projection
+
+
+def refresh_portfolio_snapshot(user_id: int) -> PortfolioSnapshot:
+    """Rebuild the snapshot from the current holdings unless it is still current. Commits."""
+    # Read the version before the holdings: a change committed in between then leaves
+    # the row with an older version than the user, so it is rebuilt on the next read.
+    holdings_version = db.session.scalar(select(User.holdings_version).where(User.id == user_id))
+    user_assets = get_user_holdings(user_id)
+    fingerprint = holdings_fingerprint(user_assets)
+    snapshot = db.session.get(PortfolioSnapshot, user_id)
+    if snapshot is not None and (snapshot.holdings_version, snapshot.fingerprint) == (holdings_version, fingerprint):
+        return snapshot
+
+    portfolio_items = portfolio_items_from_holdings(user_assets)
+    with span("calc"):
+        projection = project_portfolio(portfolio_items)
+    if snapshot is None:
+        snapshot = PortfolioSnapshot(user_id=user_id)
+    snapshot.store_projection(holdings_version or 0, fingerprint, portfolio_items, projection)
+    if not user_assets:
+        # Nothing worth storing (and possibly no such user).
+        return snapshot
+    db.session.add(snapshot)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request stored the same snapshot first; this copy is still valid to serve.
+        db.session.rollback()
+    return snapshot
+
+
+def attach_periodic_returns(portfolio_items: List[Dict]) -> List[Dict]:
+    # Native monthly/daily series are deferred on Asset; fetch them for every item at once.
+    periodic = load_periodic_returns({item["asset_id"] for item in portfolio_items if item.get("asset_id")})
+    for item in portfolio_items:
+        if item.get("asset_id") in periodic:
+            item["periodic_resolution"], item["periodic_version"], item["periodic_returns"] = periodic[
+                item["asset_id"]
+            ]
+    return portfolio_items
+
+
+def chart_bands(portfolio_items: List[Dict], total_series: List[float]) -> Optional[Dict[str, List[float]]]:
+    paths = current_app.config["MONTE_CARLO_CHART_PATHS"]
+    if not paths or len(total_series) < 2:
+        return None
+    simulation = simulate_portfolio(
+        portfolio_items, paths, len(total_series) - 1, current_app.config["MONTE_CARLO_CHART_SEED"]
+    )
+    return simulation["percentiles"]
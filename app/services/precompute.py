@@ -0,0 +1,332 @@
+import atexit
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from flask import Flask, current_app
+
+from ..metrics import span
+from ..models.calculations import PortfolioProjection, project_portfolio
+from ..models.charts import (
+    generate_multi_asset_chart,
+    generate_portfolio_band_chart,
+    generate_portfolio_chart,
+    generate_single_asset_chart,
+)
+from .chart_cache import CHART_STYLE_VERSION, maybe_evict_charts, render_charts
+from .portfolio import (
+    chart_bands,
+    get_user_holdings,
+    holdings_fingerprint,
+    portfolio_items_from_holdings,
+    refresh_portfolio_snapshot,
+    stored_projection,
+)
+
+logger = logging.getLogger(__name__)
+
+# A claimed job whose worker died is handed out again after this many seconds.
+CLAIM_TIMEOUT = 300.0
+MAX_ATTEMPTS = 3
+# Bump when the stored artifact payload changes shape.
+ARTIFACT_FORMAT = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS precompute_job (
+    user_id INTEGER PRIMARY KEY,
+    enqueued_at REAL NOT NULL,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS chart_artifact (
+    user_id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    computed_at REAL NOT NULL
+);
+"""
+
+
+def chart_requests(portfolio_items, projection, bands):
+    per_asset_series = [asset.series for asset in projection.assets]
+    requests = [
+        ("asset", generate_single_asset_chart, (series, item["name"]))
+        for item, series in zip(portfolio_items, per_asset_series)
+    ]
+    if bands:
+        requests.append(
+            ("portfolio", generate_portfolio_band_chart, (projection.series, bands["p5"], bands["p95"]))
+        )
+    else:
+        requests.append(("portfolio", generate_portfolio_chart, (projection.series,)))
+    requests.append(
+        ("multi", generate_multi_asset_chart, (per_asset_series, [item["name"] for item in portfolio_items]))
+    )
+    return requests
+
+
+def _renders_charts() -> bool:
+    config = current_app.config
+    return config["CHART_DELIVERY"] != "client" and not config["CHART_STREAM_IMAGES"]
+
+
+def artifact_version(fingerprint: str) -> str:
+    """Holdings fingerprint plus every setting that changes what /charts shows."""
+    config = current_app.config
+    settings = [
+        ARTIFACT_FORMAT,
+        CHART_STYLE_VERSION,
+        _renders_charts(),
+        config["MONTE_CARLO_CHART_PATHS"],
+        config["MONTE_CARLO_CHART_SEED"],
+    ]
+    digest = hashlib.blake2b(json.dumps(settings).encode(), digest_size=4).hexdigest()
+    return f"{fingerprint}-{digest}"
+
+
+def build_chart_artifacts(portfolio_items: List[Dict], projection: Optional[PortfolioProjection] = None) -> Dict:
+    """Compute the chart bands and render the PNGs for /charts.
+
+    ``projection`` is the user's stored snapshot when it matches the holdings; it is
+    projected here otherwise. The result only holds JSON types so it can be stored
+    by the precompute queue.
+    """
+    with span("calc"):
+        if projection is None:
+            projection = project_portfolio(portfolio_items)
+        bands = chart_bands(portfolio_items, projection.series)
+
+    charts = {"assets": [None] * len(portfolio_items), "portfolio": None, "multi": None}
+    if _renders_charts():
+        with span("chart"):
+            *charts["assets"], charts["portfolio"], charts["multi"] = render_charts(
+                chart_requests(portfolio_items, projection, bands)
+            )
+            maybe_evict_charts()
+
+    return {
+        "charts": charts,
+        "assets": [
+            {"total_invested": asset.total_invested, "final_value": asset.final_value} for asset in projection.assets
+        ],
+        "total_invested": projection.total_invested,
+        "final_value": projection.final_value,
+        "horizon": len(projection.series) - 1 if projection.series else 0,
+        "bands": {name: values[-1] for name, values in bands.items()} if bands else None,
+        "band_series": bands,
+    }
+
+
+def chart_inputs(user_id: int, user_assets: List, with_bands: bool = True):
+    """Portfolio items, projection and Monte Carlo bands for one user's charts.
+
+    The projection comes from the stored snapshot and the bands from the precomputed
+    artifacts when they match the holdings; only what is missing is computed here.
+    """
+    fingerprint = holdings_fingerprint(user_assets)
+    portfolio_items = portfolio_items_from_holdings(user_assets)
+    with span("calc"):
+        projection = stored_projection(user_id, fingerprint) or project_portfolio(portfolio_items)
+        bands = None
+        if with_bands:
+            artifacts = precompute_queue.load(user_id, artifact_version(fingerprint))
+            if artifacts is not None:
+                bands = artifacts["band_series"]
+            else:
+                bands = chart_bands(portfolio_items, projection.series)
+    return portfolio_items, projection, bands
+
+
+def _charts_on_disk(artifacts: Dict) -> bool:
+    chart_dir = Path(current_app.config["CHART_OUTPUT_DIR"])
+    charts = artifacts["charts"]
+    names = [*charts["assets"], charts["portfolio"], charts["multi"]]
+    return all(name is None or (chart_dir / name).exists() for name in names)
+
+
+class PrecomputeQueue:
+    """Persistent per-user job queue, backed by its own SQLite file.
+
+    A job is one row per user, so repeated portfolio edits coalesce into a single
+    pending recompute. Workers claim a job with a conditional UPDATE, which lets
+    worker threads and `flask jobs work` processes share the same file.
+    """
+
+    def __init__(self):
+        self._app: Optional[Flask] = None
+        self._local = threading.local()
+        self._ready_paths = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def init_app(self, app: Flask):
+        self._app = app
+
+    def _connect(self) -> sqlite3.Connection:
+        path = current_app.config["PRECOMPUTE_QUEUE_PATH"]
+        connections = self._local.__dict__.setdefault("connections", {})
+        connection = connections.get(path)
+        if connection is None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+            if path not in self._ready_paths:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._ready_paths.add(path)
+            connections[path] = connection
+        return connection
+
+    def enqueue(self, user_id: int, requeue: bool = True):
+        """Queue a recompute for ``user_id``.
+
+        With ``requeue`` a job that is already running is queued again, since the
+        holdings it read have changed; without it an existing job is left alone.
+        """
+        if not current_app.config["PRECOMPUTE_ENABLED"]:
+            return
+        conflict = (
+            "DO UPDATE SET enqueued_at = excluded.enqueued_at, claimed_at = NULL, attempts = 0"
+            if requeue
+            else "DO NOTHING"
+        )
+        try:
+            self._connect().execute(
+                f"INSERT INTO precompute_job (user_id, enqueued_at) VALUES (?, ?) ON CONFLICT(user_id) {conflict}",
+                (user_id, time.time()),
+            )
+        except sqlite3.Error:
+            # The page falls back to inline rendering, so a failed enqueue only costs latency.
+            logger.exception("Could not enqueue chart precompute for user %s", user_id)
+            return
+        self.ensure_worker()
+        self._wake.set()
+
+    def load(self, user_id: int, version: str) -> Optional[Dict]:
+        """Stored artifacts for ``user_id`` if they were built from ``version`` and are still on disk."""
+        if not current_app.config["PRECOMPUTE_ENABLED"]:
+            return None
+        self.ensure_worker()
+        try:
+            row = self._connect().execute(
+                "SELECT version, payload FROM chart_artifact WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        except sqlite3.Error:
+            logger.exception("Could not read chart artifacts for user %s", user_id)
+            return None
+        if row is None or row[0] != version:
+            return None
+        artifacts = json.loads(row[1])
+        return artifacts if _charts_on_disk(artifacts) else None
+
+    def store(self, user_id: int, version: str, artifacts: Dict):
+        self._connect().execute(
+            "INSERT INTO chart_artifact (user_id, version, payload, computed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET version = excluded.version, payload = excluded.payload, "
+            "computed_at = excluded.computed_at",
+            (user_id, version, json.dumps(artifacts), time.time()),
+        )
+
+    def _claim(self):
+        connection = self._connect()
+        now = time.time()
+        row = connection.execute(
+            "SELECT user_id, enqueued_at FROM precompute_job WHERE claimed_at IS NULL OR claimed_at < ? "
+            "ORDER BY enqueued_at LIMIT 1",
+            (now - CLAIM_TIMEOUT,),
+        ).fetchone()
+        if row is None:
+            return None
+        claimed = connection.execute(
+            "UPDATE precompute_job SET claimed_at = ?, attempts = attempts + 1 "
+            "WHERE user_id = ? AND enqueued_at = ? AND (claimed_at IS NULL OR claimed_at < ?)",
+            (now, row[0], row[1], now - CLAIM_TIMEOUT),
+        ).rowcount
+        return row if claimed else self._claim()
+
+    def _finish(self, user_id: int, enqueued_at: float, failed: bool):
+        connection = self._connect()
+        # A job re-enqueued while it ran has a new enqueued_at and stays queued.
+        if failed:
+            connection.execute(
+                "UPDATE precompute_job SET claimed_at = NULL "
+                "WHERE user_id = ? AND enqueued_at = ? AND attempts < ?",
+                (user_id, enqueued_at, MAX_ATTEMPTS),
+            )
+        connection.execute(
+            "DELETE FROM precompute_job WHERE user_id = ? AND enqueued_at = ? AND claimed_at IS NOT NULL",
+            (user_id, enqueued_at),
+        )
+
+    def run_job(self, user_id: int):
+        snapshot = refresh_portfolio_snapshot(user_id)
+        user_assets = get_user_holdings(user_id)
+        if not user_assets:
+            self._connect().execute("DELETE FROM chart_artifact WHERE user_id = ?", (user_id,))
+            return
+        fingerprint = holdings_fingerprint(user_assets)
+        projection = snapshot.projection if snapshot.fingerprint == fingerprint else None
+        artifacts = build_chart_artifacts(portfolio_items_from_holdings(user_assets), projection)
+        self.store(user_id, artifact_version(fingerprint), artifacts)
+
+    def work_once(self) -> bool:
+        """Run the oldest pending job; returns False when the queue is empty."""
+        job = self._claim()
+        if job is None:
+            return False
+        user_id, enqueued_at = job
+        started = time.perf_counter()
+        try:
+            self.run_job(user_id)
+        except Exception:
+            logger.exception("Chart precompute failed for user %s", user_id)
+            self._finish(user_id, enqueued_at, failed=True)
+        else:
+            logger.debug("Precomputed charts for user %s in %.2fs", user_id, time.perf_counter() - started)
+            self._finish(user_id, enqueued_at, failed=False)
+        return True
+
+    def pending(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM precompute_job").fetchone()[0]
+
+    def ensure_worker(self):
+        """Start the background worker thread on first use, never at import or app creation."""
+        if self._worker is not None or self._app is None or not self._app.config["PRECOMPUTE_WORKER_THREAD"]:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name="chart-precompute", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        poll_interval = self._app.config["PRECOMPUTE_POLL_INTERVAL"]
+        while not self._stop.is_set():
+            try:
+                # One app context (and so one fresh session) per job.
+                while not self._stop.is_set():
+                    with self._app.app_context():
+                        if not self.work_once():
+                            break
+            except Exception:
+                logger.exception("Chart precompute worker error")
+            self._wake.wait(poll_interval)
+            self._wake.clear()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+
+
+precompute_queue = PrecomputeQueue()
+# Registered after the chart renderer's hook, so it runs first: stop rendering before the pool goes.
+atexit.register(precompute_queue.stop)
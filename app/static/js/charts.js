@@ -0,0 +1,77 @@
+(function () {
+  const source = document.getElementById("chartData");
+  const canvases = Array.from(document.querySelectorAll("canvas[data-chart]"));
+  if (!source || !canvases.length) {
+    return;
+  }
+
+  // Server-rendered PNGs stay available whenever the browser cannot draw.
+  const useImages = () => {
+    canvases.forEach((canvas) => {
+      const img = document.createElement("img");
+      img.src = canvas.dataset.fallback;
+      img.className = "img-fluid";
+      img.alt = canvas.getAttribute("aria-label") || "";
+      canvas.replaceWith(img);
+    });
+  };
+
+  if (typeof Chart === "undefined" || !window.fetch) {
+    useImages();
+    return;
+  }
+
+  const years = (values) => values.map((_, idx) => idx);
+  const options = (yLabel) => ({
+    responsive: true,
+    animation: false,
+    scales: {
+      x: { title: { display: true, text: "Years" } },
+      y: { title: { display: true, text: yLabel } },
+    },
+  });
+
+  const draw = (canvas, data) => {
+    const kind = canvas.dataset.chart;
+    if (kind === "portfolio") {
+      const datasets = [{ label: "Historical replay", data: data.portfolio, borderColor: "green", borderWidth: 2.5, pointRadius: 0 }];
+      if (data.bands) {
+        const band = { borderWidth: 0, pointRadius: 0, backgroundColor: "rgba(0, 128, 0, 0.15)" };
+        datasets.push({ ...band, label: "P5", data: data.bands.p5 });
+        datasets.push({ ...band, label: "P95", data: data.bands.p95, fill: "-1" });
+      }
+      return new Chart(canvas, {
+        type: "line",
+        data: { labels: years(data.portfolio), datasets },
+        options: { ...options("Total Value ($)"), plugins: { legend: { display: Boolean(data.bands) } } },
+      });
+    }
+    if (kind === "multi") {
+      const longest = data.assets.reduce((acc, asset) => Math.max(acc, asset.values.length), 0);
+      return new Chart(canvas, {
+        type: "line",
+        data: {
+          labels: Array.from({ length: longest }, (_, idx) => idx),
+          datasets: data.assets.map((asset) => ({ label: asset.name, data: asset.values })),
+        },
+        options: options("Value ($)"),
+      });
+    }
+    const asset = data.assets[Number(canvas.dataset.index)];
+    return new Chart(canvas, {
+      type: "line",
+      data: { labels: years(asset.values), datasets: [{ label: asset.name, data: asset.values }] },
+      options: options("Value ($)"),
+    });
+  };
+
+  fetch(source.dataset.source, { credentials: "same-origin" })
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`chart data request failed: ${response.status}`);
+      }
+      return response.json();
+    })
+    .then((data) => canvases.forEach((canvas) => draw(canvas, data)))
+    .catch(useImages);
+})();
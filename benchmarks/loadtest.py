@@ -0,0 +1,271 @@
+"""Multi-user load test against a locally started server (or an existing deployment).
+
+Without ``--url`` the app is started on a free port in a threaded WSGI server, backed
+by a temporary SQLite database seeded with the curated assets. Synthetic users then
+register, sign in and build portfolios through the real ``auth`` and ``portfolio``
+routes. Next, ``--concurrency`` clients drive a weighted mix of ``/``,
+``/portfolio``, ``/charts`` and ``/api/calc-portfolio`` for ``--duration`` seconds.
+The report gives p50/p95/p99 latency and throughput per endpoint. Usage::
+
+    python benchmarks/loadtest.py --users 50 --concurrency 8 --duration 30
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --users 20
+"""
+import argparse
+import html
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from http.cookiejar import CookieJar
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# name -> (weight, method, path)
+DEFAULT_MIX = {
+    "index": (20, "GET", "/"),
+    "portfolio": (30, "GET", "/portfolio"),
+    "charts": (15, "GET", "/charts"),
+    "calc_portfolio": (35, "POST", "/api/calc-portfolio"),
+}
+ASSET_OPTION = re.compile(r'<option value="(\d+)">([^<]+)</option>')
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    seconds: float
+    ok: bool
+
+
+class Client:
+    """One signed-in user with its own cookie jar."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method: str, path: str, form: Optional[Dict] = None, payload: Optional[Dict] = None):
+        data, headers = None, {}
+        if form is not None:
+            data = urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif payload is not None:
+            data = json.dumps(payload).encode()
+            headers["Content-Type"] = "application/json"
+        request = Request(self.base_url + path, data=data, headers=headers, method=method)
+        with self.opener.open(request, timeout=self.timeout) as response:
+            return response.status, response.read()
+
+
+def start_local_server(workdir: str, threads: bool = True) -> Tuple[str, object]:
+    from werkzeug.serving import make_server
+
+    from app.config import Config
+
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    Config.CHART_OUTPUT_DIR = os.path.join(workdir, "charts")
+    Config.PRECOMPUTE_QUEUE_PATH = os.path.join(workdir, "jobs.db")
+
+    from app import create_app, db
+    from app.models import ensure_admin_user, seed_assets
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed_assets()
+        ensure_admin_user()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # no per-request access log
+    server = make_server("127.0.0.1", 0, app, threaded=threads)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def create_user(base_url: str, index: int, holdings: int, timeout: float, rng: random.Random) -> Tuple[Client, List]:
+    client = Client(base_url, timeout)
+    tag = uuid.uuid4().hex[:8]
+    email = f"load-{index}-{tag}@example.com"
+    client.request("POST", "/register", form={"username": f"load-{index}-{tag}", "email": email, "password": "load-test"})
+    client.request("POST", "/login", form={"email": email, "password": "load-test"})
+
+    _, page = client.request("GET", "/portfolio")
+    assets = [(asset_id, html.unescape(name)) for asset_id, name in ASSET_OPTION.findall(page.decode())]
+    if not assets:
+        raise RuntimeError("No assets available; seed the database first (flask seed)")
+    for asset_id, _ in rng.sample(assets, min(holdings, len(assets))):
+        client.request(
+            "POST",
+            "/portfolio",
+            form={
+                "form_type": "create",
+                "asset_id": asset_id,
+                "invested_amount": rng.choice([1000, 2500, 5000, 10000]),
+                "monthly_contribution": rng.choice([0, 100, 300]),
+                "yearly_contribution": rng.choice([0, 1000, 2000]),
+            },
+        )
+    return client, assets
+
+
+def _calc_payload(assets: List, rng: random.Random) -> Dict:
+    picks = rng.sample(assets, min(len(assets), rng.randint(1, 4)))
+    return {
+        "portfolio": [
+            {"asset": name, "amount": rng.choice([1000, 5000]), "monthly_contribution": rng.choice([0, 200])}
+            for _, name in picks
+        ]
+    }
+
+
+def drive(
+    clients: List[Tuple[Client, List]],
+    mix: Dict,
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> Tuple[List[Sample], float]:
+    names = list(mix)
+    weights = [mix[name][0] for name in names]
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_index: int):
+        rng = random.Random(seed + worker_index)
+        local = []
+        while time.perf_counter() < deadline:
+            client, assets = rng.choice(clients)
+            name = rng.choices(names, weights)[0]
+            _, method, path = mix[name]
+            payload = _calc_payload(assets, rng) if method == "POST" else None
+            started = time.perf_counter()
+            try:
+                status, _ = client.request(method, path, payload=payload)
+                ok = status < 400
+            except (HTTPError, URLError, OSError):
+                ok = False
+            local.append(Sample(name, time.perf_counter() - started, ok))
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict:
+    grouped = defaultdict(list)
+    for sample in samples:
+        grouped[sample.endpoint].append(sample)
+    grouped["all"] = samples
+
+    report = {}
+    for endpoint, entries in grouped.items():
+        latencies = np.array([entry.seconds for entry in entries]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+        report[endpoint] = {
+            "requests": len(entries),
+            "errors": sum(not entry.ok for entry in entries),
+            "rps": round(len(entries) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(float(latencies.mean()), 2) if len(latencies) else 0.0,
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+        }
+    return report
+
+
+def print_report(report: Dict, elapsed: float, concurrency: int):
+    print(f"\n{elapsed:.1f}s at concurrency {concurrency}")
+    print(f"{'endpoint':<16} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint in sorted(report, key=lambda name: (name == "all", name)):
+        row = report[endpoint]
+        print(
+            f"{endpoint:<16} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+
+
+def parse_mix(values: List[str]) -> Dict:
+    mix = dict(DEFAULT_MIX)
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in mix or not weight:
+            raise SystemExit(f"--mix expects NAME=WEIGHT with NAME in {', '.join(DEFAULT_MIX)}")
+        mix[name] = (float(weight), *mix[name][1:])
+    return {name: entry for name, entry in mix.items() if entry[0] > 0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running deployment instead of a local server")
+    parser.add_argument("--users", type=int, default=20, help="synthetic users to create (default 20)")
+    parser.add_argument("--holdings", type=int, default=3, help="assets per synthetic portfolio (default 3)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients (default 8)")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of traffic (default 20)")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds (default 30)")
+    parser.add_argument("--mix", action="append", default=[], help="override a weight, e.g. --mix charts=5")
+    parser.add_argument("--seed", type=int, default=1, help="seed for users and traffic (default 1)")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory() as workdir:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            base_url, server = start_local_server(workdir)
+        try:
+            rng = random.Random(args.seed)
+            started = time.perf_counter()
+            clients = [create_user(base_url, index, args.holdings, args.timeout, rng) for index in range(args.users)]
+            print(f"Created {len(clients)} users against {base_url} in {time.perf_counter() - started:.1f}s")
+
+            samples, elapsed = drive(clients, mix, args.concurrency, args.duration, args.seed)
+        finally:
+            if server is not None:
+                from app.services.precompute import precompute_queue
+
+                server.shutdown()
+                precompute_queue.stop()
+
+    report = summarize(samples, elapsed)
+    print_report(report, elapsed, args.concurrency)
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(
+                {
+                    "users": args.users,
+                    "concurrency": args.concurrency,
+                    "duration": elapsed,
+                    "mix": {name: entry[0] for name, entry in mix.items()},
+                    "endpoints": report,
+                },
+                handle,
+                indent=2,
+            )
+    return 1 if report["all"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Cold-start benchmark for the app package.
+
+Every sample runs in a fresh interpreter and measures how long ``import app`` and
+``create_app()`` take, plus the wall time of a ``flask`` CLI invocation. It also
+reports which heavy optional modules were imported during startup and whether
+startup touched the database. Usage::
+
+    python benchmarks/startup.py --runs 10 --max-create-ms 250
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("matplotlib", "pandas", "pyarrow")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _environment(database_path):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{database_path}"
+    env["FLASK_APP"] = "wsgi.py"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def sample(database_path):
+    env = _environment(database_path)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--help"], cwd=ROOT, env=env, capture_output=True, check=True
+    )
+    result["cli_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def run(runs):
+    with tempfile.TemporaryDirectory() as workdir:
+        database_path = os.path.join(workdir, "startup.db")
+        samples = [sample(database_path) for _ in range(runs)]
+        database_touched = os.path.exists(database_path)
+
+    summary = {
+        metric: round(statistics.median(entry[metric] for entry in samples), 1)
+        for metric in ("import_ms", "create_app_ms", "cli_ms")
+    }
+    summary["runs"] = runs
+    summary["heavy_modules"] = sorted({name for entry in samples for name in entry["heavy_modules"]})
+    summary["database_touched"] = database_touched
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to sample (default 5)")
+    parser.add_argument("--json", dest="json_path", help="also write the summary to this file")
+    parser.add_argument("--max-import-ms", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--max-create-ms", type=float, help="fail when the median create_app() time exceeds this")
+    args = parser.parse_args(argv)
+
+    summary = run(args.runs)
+    for key, value in summary.items():
+        print(f"{key:>18}: {value}")
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(summary, handle, indent=2)
+
+    failures = []
+    if args.max_import_ms is not None and summary["import_ms"] > args.max_import_ms:
+        failures.append(f"import {summary['import_ms']}ms > {args.max_import_ms}ms")
+    if args.max_create_ms is not None and summary["create_app_ms"] > args.max_create_ms:
+        failures.append(f"create_app {summary['create_app_ms']}ms > {args.max_create_ms}ms")
+    if summary["heavy_modules"]:
+        failures.append(f"startup imported {', '.join(summary['heavy_modules'])}")
+    if summary["database_touched"]:
+        failures.append("startup opened the database")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""Benchmarks for the calculation, charting and API hot paths.
+
+Every benchmark runs over a parameter grid (assets x years x contributions where
+the axis applies) with seeded inputs. Median and best time per call are written
+as JSON. The best-of-``--repeat`` time, the least noisy of the two, is compared
+against a stored baseline; a case slower than the baseline by more than
+``--tolerance``, again when re-measured, fails the run. Usage::
+
+    python benchmarks/suite.py                       # compare with benchmarks/baseline.json
+    python benchmarks/suite.py --filter calc.        # only cases whose id contains "calc."
+    python benchmarks/suite.py --json results.json   # also write this run's results
+    python benchmarks/suite.py --update-baseline     # store this run as the new baseline
+
+Baselines are machine specific: regenerate them on the machine that runs the check.
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+GRID = {
+    "assets": (1, 10, 50),
+    "years": (10, 40),
+    "contributions": ("none", "recurring"),
+}
+SEED = 7
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    axes: Tuple[str, ...]
+    # Builds the zero-argument callable to time for one grid point.
+    setup: Callable[[Dict], Callable[[], object]]
+
+
+def _returns(years: int, count: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(SEED + years)
+    return np.round(rng.normal(0.06, 0.15, (count, years)), 4)
+
+
+def _contributions(params: Dict) -> Tuple[float, float]:
+    return (100.0, 1000.0) if params.get("contributions") == "recurring" else (0.0, 0.0)
+
+
+def _portfolio_items(params: Dict) -> List[Dict]:
+    monthly, yearly = _contributions(params)
+    return [
+        {
+            "amount": 1000.0 + 100 * index,
+            "returns": returns.tolist(),
+            "name": f"Asset {index}",
+            "monthly_contribution": monthly,
+            "yearly_contribution": yearly,
+        }
+        for index, returns in enumerate(_returns(params["years"], params.get("assets", 1)))
+    ]
+
+
+def _calc_benchmarks() -> List[Benchmark]:
+    from app.models.calculations import build_portfolio_series, calculate_roi, compound_growth
+    from app.models.rebalancing import simulate_rebalancing
+
+    def growth(params):
+        returns = _returns(params["years"])[0].tolist()
+        monthly, yearly = _contributions(params)
+        return lambda: compound_growth(1000.0, returns, monthly, yearly)
+
+    def roi(params):
+        returns = _returns(params["years"])[0].tolist()
+        monthly, yearly = _contributions(params)
+        return lambda: calculate_roi(1000.0, returns, monthly, yearly)
+
+    def portfolio(params):
+        items = _portfolio_items(params)
+        return lambda: build_portfolio_series(items)
+
+    def rebalance(params):
+        items = _portfolio_items(params)
+        return lambda: simulate_rebalancing(items, "threshold", threshold=0.05)
+
+    return [
+        Benchmark("calc.compound_growth", ("years", "contributions"), growth),
+        Benchmark("calc.calculate_roi", ("years", "contributions"), roi),
+        Benchmark("calc.build_portfolio_series", ("assets", "years", "contributions"), portfolio),
+        Benchmark("calc.simulate_rebalancing", ("assets", "years", "contributions"), rebalance),
+    ]
+
+
+def _chart_benchmarks() -> List[Benchmark]:
+    from app.models.calculations import build_portfolio_series
+    from app.models.charts import (
+        generate_multi_asset_chart,
+        generate_portfolio_band_chart,
+        generate_portfolio_chart,
+        generate_single_asset_chart,
+        render_chart_png,
+    )
+
+    def series(params):
+        return build_portfolio_series(_portfolio_items(params))
+
+    def single(params):
+        per_asset = series(params)[1]
+        return lambda: render_chart_png(generate_single_asset_chart, per_asset[0], "Asset 0")
+
+    def total(params):
+        total_series = series(params)[0]
+        return lambda: render_chart_png(generate_portfolio_chart, total_series)
+
+    def band(params):
+        total_series = series(params)[0]
+        lower = [value * 0.8 for value in total_series]
+        upper = [value * 1.2 for value in total_series]
+        return lambda: render_chart_png(generate_portfolio_band_chart, total_series, lower, upper)
+
+    def multi(params):
+        per_asset = series(params)[1]
+        labels = [f"Asset {index}" for index in range(len(per_asset))]
+        return lambda: render_chart_png(generate_multi_asset_chart, per_asset, labels)
+
+    return [
+        Benchmark("chart.single_asset", ("years",), single),
+        Benchmark("chart.portfolio", ("years",), total),
+        Benchmark("chart.portfolio_band", ("years",), band),
+        Benchmark("chart.multi_asset", ("assets", "years"), multi),
+    ]
+
+
+def _create_bench_app(workdir: str):
+    from app.config import Config
+
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    Config.CHART_OUTPUT_DIR = os.path.join(workdir, "charts")
+    # Measure the calculation itself, not the calc-asset memo cache.
+    Config.CALC_CACHE_SIZE = 0
+    Config.METRICS_ENABLED = False
+
+    from app import create_app, db
+    from app.models import Asset
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for years in GRID["years"]:
+            for index, returns in enumerate(_returns(years, max(GRID["assets"]))):
+                asset = Asset(name=f"Bench {years}y {index}", default_amount=1000.0)
+                asset.set_historical_returns(returns.tolist())
+                db.session.add(asset)
+        db.session.commit()
+    return app
+
+
+def _api_benchmarks(app) -> List[Benchmark]:
+    client = app.test_client()
+
+    def post(path, payload):
+        def call():
+            response = client.post(path, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+
+        return call
+
+    def entries(params):
+        monthly, yearly = _contributions(params)
+        return [
+            {
+                "asset": f"Bench {params['years']}y {index}",
+                "amount": 1000,
+                "monthly_contribution": monthly,
+                "yearly_contribution": yearly,
+            }
+            for index in range(params.get("assets", 1))
+        ]
+
+    def calc_asset(params):
+        monthly, yearly = _contributions(params)
+        payload = {
+            "asset": f"Bench {params['years']}y 0",
+            "initial_amount": 1000,
+            "monthly_contribution": monthly,
+            "yearly_contribution": yearly,
+        }
+        return post("/api/calc-asset", payload)
+
+    def calc_portfolio(params):
+        return post("/api/calc-portfolio", {"portfolio": entries(params)})
+
+    def calc_batch(params):
+        grid = {"amount": [500, 1000, 2000, 5000], "monthly_contribution": [0, 50, 100, 200, 500]}
+        return post("/api/calc-portfolio/batch", {"portfolio": entries(params), "grid": grid})
+
+    return [
+        Benchmark("api.calc_asset", ("years", "contributions"), calc_asset),
+        Benchmark("api.calc_portfolio", ("assets", "years", "contributions"), calc_portfolio),
+        Benchmark("api.calc_portfolio_batch", ("assets", "years"), calc_batch),
+    ]
+
+
+def _cases(benchmarks: List[Benchmark]):
+    for benchmark in benchmarks:
+        for values in itertools.product(*(GRID[axis] for axis in benchmark.axes)):
+            params = dict(zip(benchmark.axes, values))
+            label = ",".join(f"{axis}={value}" for axis, value in params.items())
+            yield f"{benchmark.name}[{label}]", benchmark, params
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    func()  # warm-up: imports, caches, first-call allocations
+    # Like timeit: collect up front and keep the cyclic GC out of the timings, so
+    # garbage left by earlier cases doesn't land on whichever case runs next.
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _timed_samples(func, repeat, min_time)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _timed_samples(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 2),
+        "min_us": round(min(samples) * 1e6, 2),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def run(filters: List[str], repeat: int, min_time: float) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        app = _create_bench_app(workdir)
+        benchmarks = _calc_benchmarks() + _chart_benchmarks() + _api_benchmarks(app)
+        for case_id, benchmark, params in _cases(benchmarks):
+            if filters and not any(pattern in case_id for pattern in filters):
+                continue
+            with app.app_context():
+                results[case_id] = measure(benchmark.setup(params), repeat, min_time)
+            print(f"{case_id:<70} {results[case_id]['min_us']:>12.1f} us", flush=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> Dict[str, str]:
+    regressions = {}
+    print(f"\n{'case':<70} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for case_id, result in current["results"].items():
+        reference = baseline["results"].get(case_id)
+        if reference is None:
+            print(f"{case_id:<70} {'-':>12} {result['min_us']:>12.1f} {'new':>7}")
+            continue
+        ratio = result["min_us"] / reference["min_us"] if reference["min_us"] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions[case_id] = f"{case_id}: {reference['min_us']}us -> {result['min_us']}us ({ratio:.2f}x)"
+            flag = "  REGRESSION"
+        print(f"{case_id:<70} {reference['min_us']:>12.1f} {result['min_us']:>12.1f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", action="append", default=[], help="run only case ids containing this text")
+    parser.add_argument("--repeat", type=int, default=7, help="timed samples per case (default 7)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample (default 0.05)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="allowed slowdown vs the baseline best time (default 0.3 = 30%%)"
+    )
+    parser.add_argument(
+        "--no-confirm",
+        dest="confirm",
+        action="store_false",
+        help="fail on the first measurement instead of re-measuring slow cases once",
+    )
+    parser.add_argument("--json", dest="json_path", help="write this run's results to this file")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args(argv)
+
+    current = run(args.filter, args.repeat, args.min_time)
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(current, handle, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = {"meta": current["meta"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as handle:
+                baseline["results"] = json.load(handle)["results"]
+        baseline["results"].update(current["results"])
+        with open(args.baseline, "w") as handle:
+            json.dump(baseline, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    regressions = compare(current, baseline, args.tolerance)
+    if regressions and args.confirm:
+        # A real regression reproduces; scheduler noise rarely hits the same case twice.
+        print(f"\nRe-measuring {len(regressions)} slow case(s)")
+        retry = run(list(regressions), args.repeat, args.min_time)
+        for case_id, result in retry["results"].items():
+            if result["min_us"] < current["results"][case_id]["min_us"]:
+                current["results"][case_id] = result
+        rechecked = {**current, "results": {case_id: current["results"][case_id] for case_id in regressions}}
+        regressions = compare(rechecked, baseline, args.tolerance)
+    for regression in regressions.values():
+        print(f"FAIL: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
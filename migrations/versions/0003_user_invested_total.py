@@ -0,0 +1,52 @@
+"""track invested total per user
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(connection, table_name, column_name):
+    inspector = sa.inspect(connection)
+    columns = [col["name"] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _column_exists(bind, "user", "invested_total"):
+        op.add_column(
+            "user",
+            sa.Column(
+                "invested_total",
+                sa.Float(),
+                nullable=False,
+                server_default="0",
+            ),
+        )
+
+    user = sa.table("user", sa.column("id"), sa.column("invested_total"))
+    user_asset = sa.table("user_asset", sa.column("user_id"), sa.column("invested_amount"))
+    invested = (
+        sa.select(sa.func.coalesce(sa.func.sum(user_asset.c.invested_amount), 0))
+        .where(user_asset.c.user_id == user.c.id)
+        .scalar_subquery()
+    )
+    op.execute(user.update().values(invested_total=invested))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _column_exists(bind, "user", "invested_total"):
+        with op.batch_alter_table("user") as batch_op:
+            batch_op.drop_column("invested_total")
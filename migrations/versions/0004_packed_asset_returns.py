@@ -0,0 +1,67 @@
+"""store asset returns as packed float64
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 01:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+
+def _column_exists(connection, table_name, column_name):
+    inspector = sa.inspect(connection)
+    columns = [col["name"] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _column_exists(bind, "asset", "historical_returns_blob"):
+        op.add_column("asset", sa.Column("historical_returns_blob", sa.LargeBinary(), nullable=True))
+
+    asset = sa.table(
+        "asset",
+        sa.column("id", sa.Integer()),
+        sa.column("historical_returns_json", sa.Text()),
+        sa.column("historical_returns_blob", sa.LargeBinary()),
+    )
+    rows = bind.execute(
+        sa.select(asset.c.id, asset.c.historical_returns_json).where(asset.c.historical_returns_blob.is_(None))
+    ).all()
+    update = (
+        asset.update()
+        .where(asset.c.id == sa.bindparam("asset_id"))
+        .values(historical_returns_blob=sa.bindparam("blob"))
+    )
+    for start in range(0, len(rows), BACKFILL_BATCH):
+        batch = rows[start : start + BACKFILL_BATCH]
+        bind.execute(
+            update,
+            [
+                {
+                    "asset_id": row.id,
+                    "blob": np.asarray(json.loads(row.historical_returns_json or "[]"), dtype="<f8").tobytes(),
+                }
+                for row in batch
+            ],
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _column_exists(bind, "asset", "historical_returns_blob"):
+        with op.batch_alter_table("asset") as batch_op:
+            batch_op.drop_column("historical_returns_blob")
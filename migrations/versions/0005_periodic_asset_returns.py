@@ -0,0 +1,39 @@
+"""add native periodic return series to assets
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(connection, table_name, column_name):
+    inspector = sa.inspect(connection)
+    columns = [col["name"] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _column_exists(bind, "asset", "periodic_returns_blob"):
+        op.add_column("asset", sa.Column("periodic_returns_blob", sa.LargeBinary(), nullable=True))
+    if not _column_exists(bind, "asset", "periodic_resolution"):
+        op.add_column("asset", sa.Column("periodic_resolution", sa.String(length=10), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    with op.batch_alter_table("asset") as batch_op:
+        if _column_exists(bind, "asset", "periodic_resolution"):
+            batch_op.drop_column("periodic_resolution")
+        if _column_exists(bind, "asset", "periodic_returns_blob"):
+            batch_op.drop_column("periodic_returns_blob")
@@ -0,0 +1,45 @@
+"""add materialized portfolio projection snapshots
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 04:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(connection, table_name):
+    return sa.inspect(connection).has_table(table_name)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Snapshots are rebuilt on first read, so the table starts empty.
+    if not _table_exists(bind, "portfolio_snapshot"):
+        op.create_table(
+            "portfolio_snapshot",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("fingerprint", sa.String(length=32), nullable=False),
+            sa.Column("assets_json", sa.Text(), nullable=False),
+            sa.Column("series_json", sa.Text(), nullable=False),
+            sa.Column("final_value", sa.Float(), nullable=False),
+            sa.Column("total_invested", sa.Float(), nullable=False),
+            sa.Column("roi", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _table_exists(bind, "portfolio_snapshot"):
+        op.drop_table("portfolio_snapshot")
@@ -0,0 +1,98 @@
+"""unique (user_id, asset_id) index on user_asset
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 05:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_user_asset_user_id_asset_id"
+
+
+def _index_exists(connection, table_name, index_name):
+    inspector = sa.inspect(connection)
+    return index_name in [index["name"] for index in inspector.get_indexes(table_name)]
+
+
+def _merge_duplicate_holdings(bind):
+    user = sa.table("user", sa.column("id"), sa.column("invested_total"))
+    user_asset = sa.table(
+        "user_asset",
+        sa.column("id"),
+        sa.column("user_id"),
+        sa.column("asset_id"),
+        sa.column("invested_amount"),
+        sa.column("allocation_percent"),
+        sa.column("monthly_contribution"),
+        sa.column("yearly_contribution"),
+    )
+
+    # Fold every duplicate (user_id, asset_id) group into its oldest row so no
+    # invested amount or contribution is lost.
+    duplicates = bind.execute(
+        sa.select(
+            sa.func.min(user_asset.c.id),
+            sa.func.sum(user_asset.c.invested_amount),
+            sa.func.sum(user_asset.c.monthly_contribution),
+            sa.func.sum(user_asset.c.yearly_contribution),
+        )
+        .group_by(user_asset.c.user_id, user_asset.c.asset_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    if not duplicates:
+        return
+
+    for kept_id, invested_amount, monthly, yearly in duplicates:
+        bind.execute(
+            user_asset.update()
+            .where(user_asset.c.id == kept_id)
+            .values(invested_amount=invested_amount, monthly_contribution=monthly, yearly_contribution=yearly)
+        )
+
+    # The wrapping subquery keeps MySQL happy.
+    keep = (
+        sa.select(sa.func.min(user_asset.c.id).label("id"))
+        .group_by(user_asset.c.user_id, user_asset.c.asset_id)
+        .subquery()
+    )
+    bind.execute(user_asset.delete().where(user_asset.c.id.not_in(sa.select(keep.c.id))))
+
+    invested = (
+        sa.select(sa.func.coalesce(sa.func.sum(user_asset.c.invested_amount), 0))
+        .where(user_asset.c.user_id == user.c.id)
+        .scalar_subquery()
+    )
+    bind.execute(user.update().values(invested_total=invested))
+    total = sa.select(user.c.invested_total).where(user.c.id == user_asset.c.user_id).scalar_subquery()
+    bind.execute(
+        user_asset.update().values(
+            allocation_percent=sa.case(
+                (total > 0, sa.func.round(sa.cast(user_asset.c.invested_amount * 100 / total, sa.Numeric), 2)),
+                else_=0.0,
+            )
+        )
+    )
+    bind.execute(sa.table("portfolio_snapshot").delete())
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if not _index_exists(bind, "user_asset", INDEX_NAME):
+        _merge_duplicate_holdings(bind)
+        # Leading user_id also serves every per-user lookup on its own.
+        op.create_index(INDEX_NAME, "user_asset", ["user_id", "asset_id"], unique=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _index_exists(bind, "user_asset", INDEX_NAME):
+        op.drop_index(INDEX_NAME, table_name="user_asset")
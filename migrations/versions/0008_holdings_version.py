@@ -0,0 +1,43 @@
+"""version portfolio snapshots by a per-user holdings version
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(connection, table_name, column_name):
+    inspector = sa.inspect(connection)
+    columns = [col["name"] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    for table_name in ("user", "portfolio_snapshot"):
+        if not _column_exists(bind, table_name, "holdings_version"):
+            op.add_column(
+                table_name,
+                sa.Column("holdings_version", sa.Integer(), nullable=False, server_default="0"),
+            )
+
+    # Existing rows carry no version to compare; they are rebuilt on first read.
+    op.execute(sa.table("portfolio_snapshot").delete())
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table_name in ("portfolio_snapshot", "user"):
+        if _column_exists(bind, table_name, "holdings_version"):
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.drop_column("holdings_version")
@@ -0,0 +1,57 @@
+import pytest
+
+from app import create_app, db
+from app.api import calc_asset_cache
+from app.config import Config
+from app.models import User, seed_assets
+from app.models.returns_cache import returns_cache
+from app.services.catalog import asset_catalog
+from app.services.identity import identity_cache
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(Config, "CHART_OUTPUT_DIR", str(tmp_path / "charts"))
+    monkeypatch.setattr(Config, "CHART_DELIVERY", "client")
+    monkeypatch.setattr(Config, "MONTE_CARLO_CHART_PATHS", 0)
+    monkeypatch.setattr(Config, "PRECOMPUTE_ENABLED", False)
+    monkeypatch.setattr(Config, "PRECOMPUTE_QUEUE_PATH", str(tmp_path / "jobs.db"))
+
+    # Per-process caches outlive an app; each test starts from an empty database.
+    for cache in (calc_asset_cache, identity_cache.local):
+        cache.clear()
+    returns_cache.invalidate()
+    asset_catalog.invalidate()
+
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def signed_in_client(app):
+    """Factory: register and sign in ``name``, add a holding per asset id; returns (client, user_id).
+
+    The curated assets are seeded unless the test created assets of its own.
+    """
+
+    def make(name="user", asset_ids=(1,), **holding):
+        with app.app_context():
+            seed_assets()
+        client = app.test_client()
+        email = f"{name}@example.com"
+        client.post("/register", data={"username": name, "email": email, "password": "secret"})
+        client.post("/login", data={"email": email, "password": "secret"})
+        for asset_id in asset_ids:
+            client.post("/portfolio", data={"asset_id": asset_id, "invested_amount": 1000, **holding})
+        with app.app_context():
+            user_id = db.session.query(User.id).filter_by(email=email).scalar()
+        return client, user_id
+
+    return make
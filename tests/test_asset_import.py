@@ -0,0 +1,56 @@
+import pytest
+
+from app import db
+from app.models import Asset
+
+
+def _write_csv(path, rows):
+    path.write_text("asset,period,return\n" + "".join(f"Bitcoin,{period},{value}\n" for period, value in rows))
+    return str(path)
+
+
+def _calc_portfolio(client, resolution):
+    response = client.post(
+        "/api/calc-portfolio",
+        json={"portfolio": [{"asset": "Bitcoin", "amount": 1000}], "resolution": resolution},
+    )
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_annual_import_replaces_native_periodic_series(app, tmp_path):
+    runner = app.test_cli_runner()
+    monthly = _write_csv(tmp_path / "monthly.csv", [(f"2020-{month:02d}", 0.01) for month in range(1, 25)])
+    annual = _write_csv(tmp_path / "annual.csv", [(year, 0.5) for year in (2020, 2021, 2022)])
+
+    result = runner.invoke(args=["assets", "import", monthly, "--resolution", "monthly"])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(args=["assets", "import", annual])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        asset = Asset.query.filter_by(name="Bitcoin").one()
+        assert asset.periodic_resolution is None
+        assert asset.periodic_returns is None
+        db.session.remove()
+
+    client = app.test_client()
+    annual_result = _calc_portfolio(client, "annual")
+    monthly_result = _calc_portfolio(client, "monthly")
+    assert len(annual_result["yearly_values"]) == 4
+    # Without a native series the monthly projection splits the same annual returns.
+    assert len(monthly_result["yearly_values"]) == 4
+    assert abs(monthly_result["roi"] - annual_result["roi"]) < 1e-6
+
+
+@pytest.mark.parametrize("chunk_size", [2, 100])
+def test_import_rejects_non_contiguous_assets(app, tmp_path, chunk_size):
+    path = tmp_path / "split.csv"
+    path.write_text("asset,period,return\nBitcoin,2020,0.1\nGold,2020,0.02\nBitcoin,2021,0.2\n")
+
+    result = app.test_cli_runner().invoke(args=["assets", "import", str(path), "--chunk-size", str(chunk_size)])
+
+    assert result.exit_code != 0
+    assert "Bitcoin" in result.output and "not contiguous" in result.output
+    with app.app_context():
+        assert Asset.query.filter_by(name="Bitcoin").count() == 0
@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture
+def client(signed_in_client):
+    return signed_in_client("batch")[0]
+
+
+def test_user_id_may_be_a_string(signed_in_client):
+    client, user_id = signed_in_client("batch")
+    response = client.post("/api/calc-portfolio/batch", json={"portfolios": [{"user_id": str(user_id)}]})
+    assert response.status_code == 200
+    as_int = client.post("/api/calc-portfolio/batch", json={"portfolios": [{"user_id": user_id}]})
+    assert response.get_json() == as_int.get_json()
+
+
+def test_non_numeric_user_id_is_rejected(client):
+    response = client.post("/api/calc-portfolio/batch", json={"portfolios": [{"user_id": "abc"}]})
+    assert response.status_code == 400
+
+
+def test_oversized_grid_is_rejected_before_expansion(app, client):
+    values = list(range(1000))
+    grid = {"amount": values, "monthly_contribution": values, "yearly_contribution": values}
+    response = client.post(
+        "/api/calc-portfolio/batch",
+        json={"portfolio": [{"asset": "Bitcoin", "amount": 1000}], "grid": grid},
+    )
+    assert response.status_code == 400
+    assert str(app.config["BATCH_MAX_PORTFOLIOS"]) in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("grid", [{"amount": 1000}, {"amount": "1000"}, ["amount"]])
+def test_grid_values_must_be_lists(client, grid):
+    response = client.post(
+        "/api/calc-portfolio/batch",
+        json={"portfolio": [{"asset": "Bitcoin", "amount": 1000}], "grid": grid},
+    )
+    assert response.status_code == 400
+
+
+def test_grid_within_the_limit_is_expanded(client):
+    response = client.post(
+        "/api/calc-portfolio/batch",
+        json={
+            "portfolio": [{"asset": "Bitcoin", "amount": 1000}],
+            "grid": {"amount": [500, 1000], "monthly_contribution": [0, 100]},
+        },
+    )
+    assert response.status_code == 200
+    assert len(response.get_json()["results"]) == 4
+
+
+def test_user_portfolios_match_the_single_endpoint(signed_in_client):
+    client, user_id = signed_in_client("batch", asset_ids=(1, 2, 3), monthly_contribution=25)
+    single = client.post("/api/calc-portfolio", json={"user_id": user_id}).get_json()
+    batch = client.post("/api/calc-portfolio/batch", json={"portfolios": [{"user_id": user_id}]}).get_json()
+    assert batch["results"] == [single]
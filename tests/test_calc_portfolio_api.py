@@ -0,0 +1,35 @@
+import pytest
+
+PORTFOLIO = [{"asset": "Bitcoin", "amount": 1000}, {"asset": "ETF S&P 500", "amount": 500}]
+
+
+@pytest.fixture
+def client(signed_in_client):
+    return signed_in_client("calc")[0]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"paths": "abc"}, {"paths": None}, {"seed": "x"}, {"years": "1.5"}, {"seed": -1}, {"paths": 0}],
+)
+def test_invalid_simulation_options_are_rejected(client, options):
+    response = client.post("/api/calc-portfolio", json={"portfolio": PORTFOLIO, "simulation": options})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_simulation_with_valid_options(client):
+    options = {"paths": "200", "years": 5, "seed": 7}
+    response = client.post("/api/calc-portfolio", json={"portfolio": PORTFOLIO, "simulation": options})
+    assert response.status_code == 200
+    assert len(response.get_json()["simulation"]["percentiles"]["p50"]) == 6
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"threshold": None, "policy": "threshold"}, {"threshold": "abc"}, {"policy": "bogus"}, {"frequency": "weekly"}],
+)
+def test_invalid_rebalance_options_are_rejected(client, options):
+    response = client.post("/api/calc-portfolio", json={"portfolio": PORTFOLIO, "rebalance": options})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services import portfolio, precompute
+from app.services.precompute import precompute_queue
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("recomputed")
+
+
+@pytest.fixture
+def client(app, signed_in_client):
+    app.config["MONTE_CARLO_CHART_PATHS"] = 200
+    return signed_in_client("charts", asset_ids=(1, 2))[0]
+
+
+@pytest.mark.parametrize("path", ["/charts/image/portfolio", "/charts/image/multi", "/charts/image/asset/1"])
+def test_stream_revalidation_skips_projection_and_simulation(app, client, monkeypatch, path):
+    app.config["CHART_STREAM_IMAGES"] = True
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.mimetype == "image/png"
+
+    monkeypatch.setattr(precompute, "project_portfolio", _fail)
+    monkeypatch.setattr(portfolio, "simulate_portfolio", _fail)
+    assert client.get(path, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_stream_etag_changes_with_the_holdings(app, client):
+    app.config["CHART_STREAM_IMAGES"] = True
+    before = client.get("/charts/image/multi").headers["ETag"]
+    client.post("/portfolio", data={"asset_id": 3, "invested_amount": 1000})
+    response = client.get("/charts/image/multi", headers={"If-None-Match": before})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != before
+
+
+def test_chart_data_reuses_precomputed_bands(app, client, monkeypatch):
+    app.config["PRECOMPUTE_ENABLED"] = True
+    app.config["PRECOMPUTE_WORKER_THREAD"] = False
+    expected = client.get("/api/chart-data").get_json()
+    assert expected["bands"] is not None
+    with app.app_context():
+        precompute_queue.enqueue(1)
+        while precompute_queue.work_once():
+            pass
+
+    monkeypatch.setattr(portfolio, "simulate_portfolio", _fail)
+    monkeypatch.setattr(precompute, "project_portfolio", _fail)
+    response = client.get("/api/chart-data")
+    assert response.status_code == 200
+    assert response.get_json() == expected
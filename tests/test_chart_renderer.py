@@ -0,0 +1,68 @@
+import pytest
+
+from app.services.chart_renderer import ChartRenderer
+
+
+def _write(path):
+    with open(path, "w") as handle:
+        handle.write("png")
+
+
+def _write_chart(label, output_path):
+    _write(output_path)
+
+
+def _fail_chart(*inputs):
+    raise RuntimeError("cannot render")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_single_chart_failure_is_reported_not_raised(tmp_path, workers):
+    results = ChartRenderer().render_many([(_fail_chart, ("broken",), str(tmp_path / "a.png"))], workers, 5)
+    assert results == [False]
+
+
+def test_inline_render_reports_each_chart(tmp_path):
+    jobs = [
+        (_write_chart, ("ok",), str(tmp_path / "ok.png")),
+        (_fail_chart, ("broken",), str(tmp_path / "broken.png")),
+    ]
+    assert ChartRenderer().render_many(jobs, 0, 5) == [True, False]
+    assert (tmp_path / "ok.png").exists()
+
+
+def test_chart_image_answers_503_when_the_chart_fails(app, signed_in_client, monkeypatch):
+    from app.services import precompute
+
+    app.config["CHART_DELIVERY"] = "png"
+    app.config["CHART_RENDER_WORKERS"] = 0
+    client, _ = signed_in_client("img")
+    monkeypatch.setattr(precompute, "generate_multi_asset_chart", _fail_chart)
+
+    assert client.get("/charts/image/multi").status_code == 503
+
+
+def _hang_chart(label, output_path):
+    import time
+
+    time.sleep(60)
+
+
+def test_timeout_recycles_the_pool_and_stops_hung_workers(tmp_path):
+    renderer = ChartRenderer()
+    jobs = [
+        (_write_chart, ("ok",), str(tmp_path / "ok.png")),
+        (_hang_chart, ("hung",), str(tmp_path / "hung.png")),
+    ]
+    try:
+        renderer.warm(2)
+        workers = list(renderer._executor._processes.values())
+
+        assert renderer.render_many(jobs, 2, 2) == [True, False]
+        for process in workers:
+            process.join(timeout=5)
+        assert not any(process.is_alive() for process in workers)
+        # A fresh pool serves the next render.
+        assert renderer.render_many(jobs[:1] * 2, 2, 5) == [True, True]
+    finally:
+        renderer.shutdown(terminate=True)
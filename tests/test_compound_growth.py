@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from app.models.calculations import compound_growth, compound_growth_batch, compound_growth_fast
+
+# The closed forms can land one cent away from the month-by-month reference when
+# a value sits within float error of a half cent.
+TOLERANCE = 0.01 + 1e-6
+
+
+@pytest.fixture(scope="module")
+def scenarios():
+    rng = np.random.default_rng(2026)
+    cases = []
+    for _ in range(2000):
+        years = int(rng.integers(1, 41))
+        returns = rng.normal(0.07, 0.2, years).clip(-0.95, 3.0).tolist()
+        amount = float(rng.choice([rng.uniform(0, 1e4), rng.uniform(1e6, 6e8)]))
+        monthly = float(rng.uniform(0, 5e3))
+        yearly = float(rng.uniform(0, 5e4))
+        cases.append((amount, returns, monthly, yearly))
+    return cases
+
+
+def test_fast_matches_reference(scenarios):
+    for amount, returns, monthly, yearly in scenarios:
+        expected = compound_growth(amount, returns, monthly, yearly)
+        actual = compound_growth_fast(amount, returns, monthly, yearly)
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_batch_matches_reference(scenarios):
+    for amount, returns, monthly, yearly in scenarios:
+        expected = compound_growth(amount, returns, monthly, yearly)
+        actual = compound_growth_batch(amount, returns, monthly, yearly)[0]
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+def test_batch_rows_match_reference_with_padding(scenarios):
+    rows = scenarios[:200]
+    width = max(len(returns) for _, returns, _, _ in rows)
+    matrix = np.full((len(rows), width), np.nan)
+    for row, (_, returns, _, _) in enumerate(rows):
+        matrix[row, : len(returns)] = returns
+    amounts, monthly, yearly = (np.array([row[index] for row in rows]) for index in (0, 2, 3))
+
+    values = compound_growth_batch(amounts, matrix, monthly, yearly)
+    for row, (amount, returns, row_monthly, row_yearly) in enumerate(rows):
+        expected = compound_growth(amount, returns, row_monthly, row_yearly)
+        np.testing.assert_allclose(values[row, : len(expected)], expected, rtol=0, atol=TOLERANCE)
+        # Padding carries the last value forward.
+        assert np.all(values[row, len(expected) :] == values[row, len(expected) - 1])
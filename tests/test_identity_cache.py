@@ -0,0 +1,62 @@
+import pytest
+from flask_login import current_user, login_required
+
+from app import db
+from app.models import User
+from app.services.identity import CachedUser, identity_cache
+
+
+@pytest.fixture
+def whoami(app):
+    # Registered before the first request, as Flask requires.
+    @app.route("/test/whoami")
+    @login_required
+    def _whoami():
+        return {"role": current_user.role}
+
+    return "/test/whoami"
+
+
+def _set_role(app, user_id, role, between_flush_and_commit=None):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.role = role
+        db.session.flush()
+        if between_flush_and_commit is not None:
+            between_flush_and_commit(user)
+        db.session.commit()
+
+
+def test_role_change_is_visible_on_the_next_request(app, signed_in_client, whoami):
+    client, user_id = signed_in_client("roles", asset_ids=())
+    assert client.get(whoami).get_json() == {"role": "user"}
+    assert identity_cache.local.get(user_id) is not None
+
+    _set_role(app, user_id, "admin")
+
+    assert client.get(whoami).get_json() == {"role": "admin"}
+
+
+def test_entry_cached_before_the_commit_is_dropped_after_it(app, signed_in_client, whoami):
+    client, user_id = signed_in_client("roles", asset_ids=())
+    assert client.get(whoami).get_json() == {"role": "user"}
+
+    def concurrent_request(user):
+        # Another request reads the still-committed row between flush and commit.
+        identity_cache.local.set(user_id, CachedUser(user.id, user.username, user.email, "user"))
+
+    _set_role(app, user_id, "admin", between_flush_and_commit=concurrent_request)
+
+    assert identity_cache.local.get(user_id) is None
+    assert client.get(whoami).get_json() == {"role": "admin"}
+
+
+def test_logout_clears_the_entry(signed_in_client, whoami):
+    client, user_id = signed_in_client("roles", asset_ids=())
+    client.get(whoami)
+    assert identity_cache.local.get(user_id) is not None
+
+    client.get("/logout")
+
+    assert identity_cache.local.get(user_id) is None
+    assert client.get(whoami).status_code != 200
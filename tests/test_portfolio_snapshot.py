@@ -0,0 +1,38 @@
+from app import db
+from app.models import PortfolioSnapshot, User
+from app.services.portfolio import get_portfolio_snapshot
+
+
+def _final_value(client, user_id):
+    response = client.post("/api/calc-portfolio", json={"user_id": user_id})
+    assert response.status_code == 200
+    return response.get_json()["yearly_values"][-1]
+
+
+def test_snapshot_written_by_a_refresh_that_raced_an_edit_is_not_served(app, signed_in_client):
+    client, user_id = signed_in_client("snap")
+    with app.app_context():
+        user_asset_id = db.session.get(User, user_id).assets[0].id
+
+    before = _final_value(client, user_id)
+    with app.app_context():
+        stale = {
+            column.name: getattr(db.session.get(PortfolioSnapshot, user_id), column.name)
+            for column in PortfolioSnapshot.__table__.columns
+        }
+
+    client.post(
+        "/portfolio",
+        data={"form_type": "update", "user_asset_id": user_asset_id, "invested_amount": 5000},
+    )
+    # A refresh that read the holdings before the edit commits its row after it.
+    with app.app_context():
+        table = PortfolioSnapshot.__table__
+        db.session.execute(table.delete().where(table.c.user_id == user_id))
+        db.session.execute(table.insert().values(**stale))
+        db.session.commit()
+
+    after = _final_value(client, user_id)
+    assert after > before
+    with app.app_context():
+        assert get_portfolio_snapshot(user_id).projection.final_value == after
@@ -0,0 +1,83 @@
+import itertools
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import precompute
+from app.services.precompute import MAX_ATTEMPTS, precompute_queue
+
+
+@pytest.fixture
+def queue(app, monkeypatch):
+    # Jobs are driven by hand; the queue file lives in the test's tmp_path (see conftest).
+    app.config["PRECOMPUTE_ENABLED"] = True
+    app.config["PRECOMPUTE_WORKER_THREAD"] = False
+    # enqueued_at tells a re-armed job from the one being run, so keep it strictly increasing.
+    clock = itertools.count(1_000_000)
+    monkeypatch.setattr(precompute, "time", SimpleNamespace(time=lambda: float(next(clock)), perf_counter=time.perf_counter))
+    with app.app_context():
+        yield precompute_queue
+
+
+def test_jobs_coalesce_per_user(queue):
+    for _ in range(3):
+        queue.enqueue(1)
+    queue.enqueue(2)
+    queue.enqueue(1, requeue=False)
+
+    assert queue.pending() == 2
+
+
+def test_requeue_re_arms_a_running_job(queue, monkeypatch):
+    runs = []
+
+    def run_job(user_id):
+        runs.append(user_id)
+        if len(runs) == 1:
+            # The holdings change while the first recompute is running.
+            queue.enqueue(user_id, requeue=True)
+
+    monkeypatch.setattr(queue, "run_job", run_job)
+    queue.enqueue(1)
+
+    assert queue.work_once()
+    assert queue.pending() == 1
+    assert queue.work_once()
+    assert queue.pending() == 0
+    assert runs == [1, 1]
+
+
+def test_enqueue_without_requeue_leaves_a_running_job_alone(queue, monkeypatch):
+    monkeypatch.setattr(queue, "run_job", lambda user_id: queue.enqueue(user_id, requeue=False))
+    queue.enqueue(1)
+
+    assert queue.work_once()
+    assert queue.pending() == 0
+
+
+def test_job_is_dropped_after_max_attempts(queue, monkeypatch):
+    attempts = []
+
+    def run_job(user_id):
+        attempts.append(user_id)
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(queue, "run_job", run_job)
+    queue.enqueue(1)
+
+    for _ in range(MAX_ATTEMPTS):
+        assert queue.pending() == 1
+        assert queue.work_once()
+    assert queue.pending() == 0
+    assert not queue.work_once()
+    assert len(attempts) == MAX_ATTEMPTS
+
+
+def test_load_returns_none_on_version_mismatch(queue):
+    artifacts = {"charts": {"assets": [None], "portfolio": None, "multi": None}, "band_series": None}
+    queue.store(1, "v1", artifacts)
+
+    assert queue.load(1, "v1") == artifacts
+    assert queue.load(1, "v2") is None
+    assert queue.load(2, "v1") is None
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import Asset
+
+HOLDING_COUNTS = (1, 5, 30)
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def clients(app, signed_in_client):
+    with app.app_context():
+        for index in range(max(HOLDING_COUNTS)):
+            asset = Asset(name=f"Asset {index}", default_amount=1000.0)
+            asset.set_historical_returns([0.05 + index / 1000, -0.02, 0.07, 0.04])
+            db.session.add(asset)
+        db.session.commit()
+        asset_ids = [asset.id for asset in Asset.query.order_by(Asset.id)]
+
+    return {
+        count: signed_in_client(f"user{count}", asset_ids=asset_ids[:count], monthly_contribution=50)
+        for count in HOLDING_COUNTS
+    }
+
+
+def _statements_per_request(app, client, method, path, **kwargs):
+    with app.app_context():
+        engine = db.engine
+    # The first call warms the per-process caches (signed-in user, parsed returns, snapshot).
+    assert client.open(path, method=method, **kwargs).status_code == 200
+    with count_statements(engine) as statements:
+        assert client.open(path, method=method, **kwargs).status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "method,path",
+    [("GET", "/portfolio"), ("GET", "/charts"), ("POST", "/api/calc-portfolio")],
+)
+def test_statement_count_does_not_grow_with_holdings(app, clients, method, path):
+    counts = {}
+    for holdings, (client, user_id) in clients.items():
+        kwargs = {"json": {"user_id": user_id}} if method == "POST" else {}
+        counts[holdings] = _statements_per_request(app, client, method, path, **kwargs)
+
+    assert len(set(counts.values())) == 1, counts
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from app.models.calculations import project_portfolio
+from app.models.rebalancing import REBALANCE_FREQUENCIES, simulate_rebalancing
+
+
+def _item(name, returns, amount=1000.0, percent=0.0, monthly=0.0, yearly=0.0):
+    return {
+        "name": name,
+        "amount": amount,
+        "returns": returns,
+        "percent": percent,
+        "monthly_contribution": monthly,
+        "yearly_contribution": yearly,
+    }
+
+
+@pytest.mark.parametrize("policy", ["calendar", "threshold"])
+def test_single_asset_matches_buy_and_hold(policy):
+    items = [_item("Only", [0.12, -0.08, 0.3, 0.05, -0.2], monthly=50.0, yearly=300.0)]
+    result = simulate_rebalancing(items, policy, frequency="monthly", threshold=0.01)
+    projection = project_portfolio(items, "monthly")
+
+    assert result["yearly_values"] == projection.series
+    assert result["total_invested"] == projection.total_invested
+    assert result["turnover"] == 0.0
+    assert result["annual_turnover"] == 0.0
+
+
+@pytest.mark.parametrize("frequency", list(REBALANCE_FREQUENCIES))
+def test_calendar_rebalances_once_per_period_before_the_horizon(frequency):
+    years = 10
+    items = [_item("A", [0.1] * years, percent=60), _item("B", [0.02] * years, percent=40)]
+    result = simulate_rebalancing(items, "calendar", frequency=frequency)
+
+    periods = 12 // REBALANCE_FREQUENCIES[frequency]
+    # Every period end except the horizon itself, where there is nothing left to hold.
+    assert result["rebalances"] == years * periods - 1
+    assert result["turnover"] > 0
+
+
+def test_threshold_rebalances_when_a_weight_drifts_past_it():
+    # 50% a year against 0%: the growing asset's weight passes 55% after six months.
+    items = [_item("Fast", [0.5, 0.5]), _item("Flat", [0.0, 0.0])]
+    result = simulate_rebalancing(items, "threshold", threshold=0.05)
+    assert result["rebalances"] == 3
+
+    untouched = simulate_rebalancing(items, "threshold", threshold=0.5)
+    assert untouched["rebalances"] == 0
+    assert untouched["yearly_values"] == project_portfolio(items, "monthly").series
+
+
+def test_holdings_with_shorter_histories_drop_out_of_the_targets():
+    short = _item("Short", [0.4, -0.3, 0.5])
+    long = _item("Long", [0.07, 0.05, 0.1, -0.04, 0.06, 0.08, 0.03, 0.09, -0.02, 0.05])
+    result = simulate_rebalancing([short, long], "threshold", threshold=0.05)
+
+    short_series = result["per_asset_series"]["Short"]
+    assert len(set(short_series[3:])) == 1
+    # Once only one holding is running there is no drift left to trade.
+    capped = simulate_rebalancing([short, {**long, "returns": long["returns"][:3]}], "threshold", threshold=0.05)
+    assert result["rebalances"] == capped["rebalances"]
+
+
+def test_empty_histories_keep_the_invested_amounts():
+    result = simulate_rebalancing([_item("Empty", [], amount=500.0)], "calendar")
+    assert result["yearly_values"] == [500.0]
+    assert result["rebalances"] == 0
+    assert result["annual_turnover"] == 0.0
+
+
+def test_matches_a_step_by_step_rebalance():
+    rng = np.random.default_rng(3)
+    items = [
+        _item(f"A{index}", rng.normal(0.06, 0.15, 8).tolist(), amount=1000.0 + 250 * index, monthly=25.0 * index)
+        for index in range(4)
+    ]
+    result = simulate_rebalancing(items, "calendar", frequency="quarterly")
+
+    monthly = [(1 + np.asarray(item["returns"])) ** (1 / 12) - 1 for item in items]
+    values = np.array([item["amount"] for item in items])
+    targets = values / values.sum()
+    yearly = [round(values.sum(), 2)]
+    for step in range(96):
+        contributions = np.array([item["monthly_contribution"] for item in items])
+        values = (values + contributions) * (1 + np.array([rates[step // 12] for rates in monthly]))
+        if (step + 1) % 3 == 0 and step + 1 < 96:
+            values = values.sum() * targets
+        if (step + 1) % 12 == 0:
+            yearly.append(round(values.sum(), 2))
+
+    assert result["yearly_values"] == pytest.approx(yearly, abs=0.02)
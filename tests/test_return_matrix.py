@@ -0,0 +1,31 @@
+import numpy as np
+
+from app import db
+from app.models import Asset, load_return_matrix
+
+
+def test_loads_packed_and_json_returns_into_a_padded_matrix(app):
+    with app.app_context():
+        packed = Asset(name="Packed", default_amount=1.0)
+        packed.set_historical_returns([0.1, 0.2, 0.3])
+        legacy = Asset(name="Legacy", default_amount=1.0, historical_returns_json="[0.05]")
+        db.session.add_all([packed, legacy])
+        db.session.commit()
+        # Rows migrated before the packed column existed only carry JSON.
+        db.session.execute(db.update(Asset).where(Asset.id == legacy.id).values(historical_returns_blob=None))
+        db.session.commit()
+
+        ids, matrix, lengths = load_return_matrix([packed.id, legacy.id])
+        rows = {asset_id: row for row, asset_id in enumerate(ids)}
+
+        assert sorted(ids) == sorted([packed.id, legacy.id])
+        assert matrix.shape == (2, 3)
+        np.testing.assert_array_equal(matrix[rows[packed.id]], [0.1, 0.2, 0.3])
+        np.testing.assert_array_equal(matrix[rows[legacy.id]], [0.05, np.nan, np.nan])
+        assert lengths[rows[legacy.id]] == 1
+
+
+def test_no_assets_gives_an_empty_matrix(app):
+    with app.app_context():
+        ids, matrix, lengths = load_return_matrix([])
+        assert ids == [] and matrix.shape == (0, 0) and len(lengths) == 0